@@ -0,0 +1,62 @@
+"""Monte Carlo rollouts per second of the AI controller by worker count.
+
+Plays a few rounds to reach a mid-game position, then times one turn's
+evaluation with a fixed number of rollouts for 1, 2, 4, ... worker
+processes up to the machine's core count, plus 0 workers (one thread in
+this process). A warm-up evaluation first lets each worker build its
+CityDistances tables. Rollouts are independent and only the game state is
+sent per batch, so the rate should grow close to linearly up to the
+number of cores; past it, extra workers only add overhead.
+
+Run from the repository root: python benchmarks/bench_ai.py [rollouts] [rounds]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from settings import players
+from engine import Game
+from ai import AIController, CityDistances, STRATEGIES, DEFAULT_STRATEGY, ROLLOUT_BATCH, play_turn
+
+def mid_game(rounds, seed=0):
+    game = Game(seed, rng=random.Random(seed))
+    rng = random.Random(seed)
+    distances = CityDistances(game.board)
+    for _ in range(rounds * len(players)):
+        play_turn(game, game.current_player, rng, STRATEGIES[DEFAULT_STRATEGY], distances)
+        game.end_turn()
+    return game
+
+def rate(game, workers, rollouts):
+    ai = AIController(game, players, budget=float('inf'), rollouts=2 * ROLLOUT_BATCH * max(1, workers), workers=workers)
+    ai.evaluate(game.current_player)
+    ai.max_rollouts = rollouts
+    start = time.perf_counter()
+    _, played = ai.evaluate(game.current_player)
+    elapsed = time.perf_counter() - start
+    ai.close()
+    return played / elapsed
+
+def main():
+    rollouts = int(sys.argv[1]) if len(sys.argv) > 1 else 128
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    cores = os.cpu_count()
+    game = mid_game(rounds)
+    print(f"{len(game.units)} units after {rounds} rounds, {rollouts} rollouts per run, {cores} cores")
+    counts = [0] + sorted({1, 2, 4, cores} | {w for w in (8, 16, 32) if w <= cores})
+    base = None
+    # Efficiency is the speedup over one worker divided by the cores the workers can use
+    print(f"{'workers':>7} {'rollouts/s':>11} {'vs 1 worker':>12} {'efficiency':>11}")
+    for workers in counts:
+        r = rate(game, workers, rollouts)
+        if workers == 1:
+            base = r
+        speedup = f'{r / base:.2f}x' if base else '-'
+        efficiency = f'{r / base / min(workers, cores):.0%}' if base else '-'
+        print(f"{workers:>7} {r:>11.1f} {speedup:>12} {efficiency:>11}")
+
+if __name__ == '__main__':
+    main()
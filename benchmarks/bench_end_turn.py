@@ -0,0 +1,94 @@
+"""End-of-turn cost at 100, 1,000 and 10,000 units.
+
+Compares Game.end_turn with the previous version, which made separate
+passes over every unit on the map for movement, sentries, fuel and
+healing. Units are spread over the map at random and keep enough fuel to
+survive, so every round does the same work.
+
+Run from the repository root: python benchmarks/bench_end_turn.py [rounds]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from settings import players, movements, max_fuel, sea_units
+from engine import Game
+from units import get_allowed
+from hex_utils import get_neighbors
+
+def end_turn_multipass(game):
+    """Previous Game.end_turn: one pass over all units per concern."""
+    game.current_player = players[(players.index(game.current_player) + 1) % len(players)]
+    for unit in game.units:
+        if unit.owner == game.current_player:
+            unit.movement_left = movements[unit.type]
+    for unit in game.units:
+        if unit.sentry and unit.owner == game.current_player:
+            if any(u.owner != unit.owner for n in get_neighbors(*unit.pos, game.grid) for u in game.units.at(n)):
+                game.wake(unit)
+    for unit in [u for u in game.units if u.owner == game.current_player and not u.sentry]:
+        if unit in game.units:
+            game.move_along_path(unit)
+    if game.current_player == players[0]:
+        for unit in [u for u in game.units if u.type in ['Fighter', 'AirCarrier', 'TransportPlane']]:
+            if unit.fuel is None:
+                continue
+            if unit.pos in game.cities and game.city_owners[unit.pos] == unit.owner:
+                unit.fuel = max_fuel[unit.type]
+            else:
+                unit.fuel -= 1
+                if unit.fuel <= 0:
+                    game._destroy(unit, 'fuel')
+        for unit in game.units:
+            if not unit.did_move:
+                heal = max(1, int(0.1 * unit.max_hp))
+                if unit.pos in game.cities and game.city_owners[unit.pos] == unit.owner:
+                    heal = max(1, int(0.2 * unit.max_hp))
+                unit.hp = min(unit.max_hp, unit.hp + heal)
+            unit.did_move = False
+        game._produce()
+        game.turn += 1
+        game.check_win()
+    game.emit('turn_started', player=game.current_player, turn=game.turn)
+
+def populated_game(count, seed=0):
+    game = Game(seed)
+    rng = random.Random(seed)
+    by_terrain = {}
+    for pos in game.grid:
+        if pos not in game.cities:
+            by_terrain.setdefault(game.terrain[pos], []).append(pos)
+    types = ['Infantry', 'Tank', 'Fighter', 'TransportPlane', 'Destroyer', 'TransportShip']
+    for _ in range(count):
+        utype = rng.choice(types)
+        terrain = rng.choice(sorted(get_allowed(utype) & by_terrain.keys()))
+        unit = game.units.create(utype, rng.choice(players), rng.choice(by_terrain[terrain]), 0, max_fuel.get(utype))
+        unit.hp = rng.randint(1, unit.max_hp)
+        if utype not in sea_units and rng.random() < 0.1:
+            unit.sentry = True
+    return game
+
+def time_rounds(end_turn, count, rounds, repeat=5):
+    """Best over `repeat` fresh games of the mean end_turn time over `rounds` rounds."""
+    best = float('inf')
+    for _ in range(repeat):
+        game = populated_game(count)
+        start = time.perf_counter()
+        for _ in range(rounds * len(players)):
+            end_turn(game)
+        best = min(best, (time.perf_counter() - start) / (rounds * len(players)))
+    return best
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    print(f"{'units':>6} {'multi-pass (ms)':>16} {'end_turn (ms)':>14} {'speedup':>8}")
+    for count in (100, 1000, 10000):
+        old_t = time_rounds(end_turn_multipass, count, rounds)
+        new_t = time_rounds(Game.end_turn, count, rounds)
+        print(f"{count:>6} {old_t * 1e3:>16.3f} {new_t * 1e3:>14.3f} {old_t / new_t:>7.1f}x")
+
+if __name__ == '__main__':
+    main()
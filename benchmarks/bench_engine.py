@@ -0,0 +1,64 @@
+"""Headless simulation speed of the rules engine under random play.
+
+Every player attacks whatever is in range, otherwise walks each unit to a
+random reachable hex, and keeps every city producing. Nothing is rendered,
+so this measures the rules engine (plus reachability and pathfinding).
+
+Run from the repository root: python benchmarks/bench_engine.py [rounds] [games]
+"""
+import os
+import random
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from settings import unit_types, sea_units, capacity
+from engine import Game
+from hex_utils import hexes_in_range
+from units import get_reachable, find_path
+
+def play_turn(game, rng):
+    player = game.current_player
+    for c in game.cities:
+        if game.city_owners[c] == player and game.productions[c]['turns_left'] == 0:
+            options = [ut for ut in unit_types if c in game.coastal_cities or ut not in sea_units]
+            game.set_production(c, rng.choice(options))
+    for unit in [u for u in game.units if u.owner == player]:
+        if unit not in game.units or unit.movement_left <= 0 or game.winner:
+            continue
+        targets = [h for h in hexes_in_range(unit.pos, unit.range)
+                   if any(u.owner != player for u in game.units.at(h))
+                   or (h in game.cities and game.city_owners[h] != player and (game.city_owners[h] is not None or unit.type == 'Infantry'))]
+        if targets:
+            game.attack(unit, rng.choice(sorted(targets)))
+            continue
+        reachable = sorted(get_reachable(unit, game.grid, game.terrain, game.cities, game.city_owners, game.units, game.coastal_cities, game.transport_loads))
+        if reachable:
+            path = find_path(unit.pos, rng.choice(reachable), unit, game.grid, game.terrain, game.cities, game.city_owners, game.units, game.transport_loads, capacity, game.coastal_cities)
+            if path:
+                game.move_unit(unit, path)
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    games = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    total_turns = 0
+    total_time = 0.0
+    events = Counter()
+    for seed in range(games):
+        rng = random.Random(seed)
+        game = Game(seed, rng=rng)
+        game.subscribe(lambda kind, data: events.update([kind]))
+        start = time.perf_counter()
+        while game.turn <= rounds and not game.winner:
+            play_turn(game, rng)
+            game.end_turn()
+            total_turns += 1
+        total_time += time.perf_counter() - start
+        print(f"seed {seed}: round {game.turn}, {len(game.units)} units, winner {game.winner}")
+    print(f"{total_turns} player turns in {total_time:.2f} s ({total_turns / total_time:.0f} turns/s)")
+    print(', '.join(f"{kind} {count}" for kind, count in sorted(events.items())))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""Path query cost: A* find_path against the lazily grown PathCache fields.
+
+For each map size, times a one-hex move right after a board change (the
+cache starts empty, as on every click) and a drag preview sweeping many
+targets from the same unit. Also checks that no cached path is longer than
+the one find_path returns, and that both agree on which targets are
+reachable.
+
+Run from the repository root: python benchmarks/bench_paths.py [radius...]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from settings import players, map_params, capacity
+from engine import Game
+from units import PathCache, find_path, get_reachable
+
+# Hexes a drag preview passes over; A* to unreachable ones floods the whole island
+DRAG_TARGETS = 50
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) / repeat, result
+
+def main():
+    radii = [int(a) for a in sys.argv[1:]] or [map_params['circular_radius'], 165]
+    for radius in radii:
+        params = dict(map_params, circular_radius=radius, num_cities=max(map_params['num_cities'], radius * radius // 50))
+        game = Game(0, params=params)
+        unit = next(u for u in game.units.owned_by(players[0]) if u.type == 'Infantry')
+        args = (unit, game.grid, game.terrain, game.cities, game.city_owners, game.units, game.transport_loads, capacity, game.coastal_cities)
+        near = sorted(get_reachable(unit, game.grid, game.terrain, game.cities, game.city_owners, game.units, game.coastal_cities, game.transport_loads))
+        step = next(h for h in near if len(find_path(unit.pos, h, *args)) == 1)
+
+        def cached_click():
+            # A move bumps the board version, so each click starts from an empty cache
+            game.units.mark_changed()
+            return game.path_cache.find_path(unit.pos, step, *args)
+
+        astar_t, _ = timed(lambda: find_path(unit.pos, step, *args), 200)
+        cache_t, _ = timed(cached_click, 200)
+
+        rng = random.Random(radius)
+        land = [h for h in game.grid if game.terrain[h] == 'land' and h not in game.cities]
+        targets = rng.sample(land, DRAG_TARGETS)
+        start = time.perf_counter()
+        astar = [find_path(unit.pos, t, *args) for t in targets]
+        astar_drag = time.perf_counter() - start
+        cache = PathCache()
+        start = time.perf_counter()
+        cached = [cache.find_path(unit.pos, t, *args) for t in targets]
+        cache_drag = time.perf_counter() - start
+        assert all((a is None) == (c is None) for a, c in zip(astar, cached)), "reachability differs"
+        assert all(len(c) <= len(a) for a, c in zip(astar, cached) if a is not None), "cached path longer than find_path"
+        shorter = sum(len(c) < len(a) for a, c in zip(astar, cached) if a is not None)
+        found = sum(a is not None for a in astar)
+
+        print(f"radius {radius}: {len(game.grid)} hexes, {found}/{len(targets)} drag targets reachable, {shorter} cached paths shorter than A*")
+        print(f"  {'one-hex move':<16}find_path {astar_t * 1e3:8.3f} ms   cache (cold) {cache_t * 1e3:8.3f} ms")
+        print(f"  {f'{DRAG_TARGETS}-hex drag':<16}find_path {astar_drag * 1e3:8.1f} ms   cache        {cache_drag * 1e3:8.1f} ms")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""Compare hex picking by cube rounding against the old full-grid scan.
+
+Run from the repository root: python benchmarks/bench_pixel_to_axial.py
+"""
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from settings import HEX_SIZE, SCREEN_WIDTH, SCREEN_HEIGHT
+from hex_utils import pixel_to_axial
+
+def pixel_to_axial_scan(mx, my, zoom, cam_x, cam_y, screen_width, screen_height, grid):
+    """Previous implementation: nearest hex centre over the whole grid."""
+    world_x = (mx - screen_width / 2 - cam_x) / zoom
+    world_y = (my - screen_height / 2 - cam_y) / zoom
+    closest = None
+    min_dist = float('inf')
+    for q, r in grid:
+        cx = HEX_SIZE * (3 / 2 * q)
+        cy = HEX_SIZE * (math.sqrt(3) * (r + q / 2))
+        dist = math.hypot(cx - world_x, cy - world_y)
+        if dist < min_dist:
+            min_dist = dist
+            closest = (q, r)
+    if min_dist < HEX_SIZE:
+        return closest
+    return None
+
+def hexagon(radius):
+    return [(q, r) for q in range(-radius, radius + 1)
+            for r in range(max(-radius, -q - radius), min(radius, -q + radius) + 1)]
+
+def time_per_call(fn, queries, grid):
+    start = time.perf_counter()
+    for mx, my, zoom, cam_x, cam_y in queries:
+        fn(mx, my, zoom, cam_x, cam_y, SCREEN_WIDTH, SCREEN_HEIGHT, grid)
+    return (time.perf_counter() - start) / len(queries)
+
+def main():
+    rng = random.Random(0)
+    print(f"{'hexes':>8} {'scan (ms)':>12} {'rounding (us)':>14} {'speedup':>10}")
+    for radius in (40, 129, 408):
+        grid = hexagon(radius)
+        grid_set = set(grid)
+        extent = HEX_SIZE * 1.5 * radius
+        queries = [(rng.uniform(0, SCREEN_WIDTH), rng.uniform(0, SCREEN_HEIGHT), rng.uniform(0.5, 3.0),
+                    rng.uniform(-extent, extent), rng.uniform(-extent, extent)) for _ in range(2000)]
+        # The scan is the reference: both must agree on every query
+        for query in queries[:20]:
+            assert pixel_to_axial_scan(*query, SCREEN_WIDTH, SCREEN_HEIGHT, grid) == pixel_to_axial(*query, SCREEN_WIDTH, SCREEN_HEIGHT, grid_set)
+        scan = time_per_call(pixel_to_axial_scan, queries[:max(3, 100000 // len(grid))], grid)
+        fast = time_per_call(pixel_to_axial, queries, grid_set)
+        print(f"{len(grid):>8} {scan * 1e3:>12.2f} {fast * 1e6:>14.2f} {scan / fast:>9.0f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""Reachability search cost against movement range (1-20) for a Fighter.
+
+Compares get_reachable_distances with the previous search, which queued
+every neighbour and filtered duplicates on pop.
+
+Run from the repository root: python benchmarks/bench_reachable.py
+"""
+import os
+import sys
+import time
+from collections import deque
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from settings import players, unit_stats, movements, max_stack, map_params
+from map_cache import load_or_generate_map
+from players import assign_starting_cities_and_units
+from hex_utils import get_neighbors
+from units import get_allowed, get_reachable_distances, is_loadable_transport_hex, is_hex_occupied
+
+def get_reachable_queued(unit, grid, terrain, cities, city_owners, units, coastal_cities, transport_loads):
+    """Previous implementation: duplicates are queued and discarded on pop."""
+    pos = unit.pos
+    mov = unit.movement_left
+    utype = unit.type
+    allowed = get_allowed(utype)
+    visited = set()
+    queue = deque([(pos[0], pos[1], 0)])
+    reach = set()
+    while queue:
+        cq, cr, dist = queue.popleft()
+        key = (cq, cr)
+        if key in visited or dist > mov:
+            continue
+        visited.add(key)
+        if key in cities and city_owners[key] is None or (key not in cities and any(u.type == 'AirCarrier' and u.owner != unit.owner for u in units.at(key))):
+            continue
+        allow_city = utype in ['TransportShip', 'Destroyer', 'Cruiser', 'AirCarrier'] and key in coastal_cities and city_owners.get(key) == unit.owner
+        loadable = is_loadable_transport_hex(key, unit, units, transport_loads, terrain, cities, city_owners, grid)
+        occupied = is_hex_occupied(key, unit.owner, units, cities, city_owners, max_stack)
+        if dist == 0 or (terrain[key] in allowed or loadable or allow_city) and (not occupied or loadable):
+            if dist > 0:
+                reach.add(key)
+            for nq, nr in get_neighbors(cq, cr, grid):
+                n_key = (nq, nr)
+                if n_key in cities and city_owners[n_key] != unit.owner and utype != 'Infantry':
+                    continue
+                queue.append((nq, nr, dist + 1))
+    return reach
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) / repeat, result
+
+def main():
+    grid, terrain, cities, coastal_cities, start_cities = load_or_generate_map(0, len(players), map_params)
+    city_owners, units, transport_loads, productions, city_hp, start_cities = assign_starting_cities_and_units(cities, coastal_cities, players, grid, unit_stats, movements, start_cities)
+    fighter = units.create('Fighter', players[0], (0, 0))
+    args = (fighter, grid, terrain, cities, city_owners, units, coastal_cities, transport_loads)
+    print(f"{'range':>5} {'hexes':>6} {'queued (ms)':>12} {'bounded (ms)':>13} {'speedup':>8}")
+    for mov in range(1, 21):
+        fighter.movement_left = mov
+        repeat = max(3, 200 // mov)
+        old_t, old_reach = timed(lambda: get_reachable_queued(*args), repeat)
+        new_t, distances = timed(lambda: get_reachable_distances(*args), repeat)
+        assert old_reach == set(distances)
+        print(f"{mov:>5} {len(distances):>6} {old_t * 1e3:>12.3f} {new_t * 1e3:>13.3f} {old_t / new_t:>7.1f}x")
+
+if __name__ == '__main__':
+    main()
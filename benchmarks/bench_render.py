@@ -0,0 +1,74 @@
+"""Frame cost of drawing the terrain at full zoom-out on a large map.
+
+Compares drawing every on-screen hex each frame with blitting the cached
+TerrainLayer tiles, after checking both produce the same picture.
+
+Run from the repository root: python benchmarks/bench_render.py [radius] [frames]
+"""
+import os
+import sys
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import pygame
+from settings import players, map_params, SCREEN_WIDTH, SCREEN_HEIGHT, BLACK
+from map_cache import load_or_generate_map
+from players import assign_starting_cities_and_units
+from settings import unit_stats, movements
+from hex_utils import axial_to_pixel
+from rendering import draw_hex, is_within_screen_bounds, terrain_color, TerrainLayer
+
+ZOOM = 0.5
+
+def draw_terrain_per_hex(screen, grid, terrain, cities, city_owners, cam_x, cam_y):
+    screen.fill(BLACK)
+    for q, r in grid:
+        x, y = axial_to_pixel(q, r, ZOOM, cam_x, cam_y, SCREEN_WIDTH, SCREEN_HEIGHT)
+        if is_within_screen_bounds(x, y, ZOOM, SCREEN_WIDTH, SCREEN_HEIGHT):
+            is_city = (q, r) in cities
+            draw_hex(screen, x, y, terrain_color(terrain[(q, r)], city_owners.get((q, r)), is_city), ZOOM)
+
+def draw_terrain_layer(screen, layer, cam_x, cam_y):
+    screen.fill(BLACK)
+    layer.draw(screen, ZOOM, cam_x, cam_y, SCREEN_WIDTH, SCREEN_HEIGHT)
+
+def timed(fn, frames):
+    start = time.perf_counter()
+    for i in range(frames):
+        fn(i)
+    return (time.perf_counter() - start) / frames
+
+def main():
+    radius = int(sys.argv[1]) if len(sys.argv) > 1 else 150
+    frames = int(sys.argv[2]) if len(sys.argv) > 2 else 120
+    pygame.init()
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    params = dict(map_params, circular_radius=radius, num_cities=radius * radius // 50)
+    grid, terrain, cities, coastal_cities, start_cities = load_or_generate_map(0, len(players), params)
+    city_owners = assign_starting_cities_and_units(cities, coastal_cities, players, grid, unit_stats, movements, start_cities)[0]
+    layer = TerrainLayer(grid, terrain, cities, city_owners)
+    print(f"radius {radius}: {len(grid)} hexes, {len(cities)} cities, {len(layer.tile_hexes)} tiles, zoom {ZOOM}")
+
+    # Same picture but for a few pixels on hex edges, which pygame's polygon fill
+    # rasterises slightly differently at different absolute positions
+    draw_terrain_per_hex(screen, grid, terrain, cities, city_owners, 0, 0)
+    expected = pygame.surfarray.array3d(screen)
+    draw_terrain_layer(screen, layer, 0, 0)
+    differing = (pygame.surfarray.array3d(screen) != expected).any(axis=2).mean()
+    print(f"pixels differing: {differing:.2%}")
+
+    # Pan slowly so the layer keeps rendering newly exposed tiles
+    pan = lambda i: (-i * 4, -i * 2)
+    per_hex = timed(lambda i: draw_terrain_per_hex(screen, grid, terrain, cities, city_owners, *pan(i)), frames)
+    layer.surfaces.clear()
+    layer.cached_pixels = 0
+    cold = timed(lambda i: draw_terrain_layer(screen, layer, *pan(i)), frames)
+    warm = timed(lambda i: draw_terrain_layer(screen, layer, *pan(i)), frames)
+    print(f"per hex   {per_hex * 1e3:7.2f} ms/frame")
+    print(f"layer     {cold * 1e3:7.2f} ms/frame while panning (tiles rendered on first use)")
+    print(f"layer     {warm * 1e3:7.2f} ms/frame with tiles cached")
+
+if __name__ == '__main__':
+    main()
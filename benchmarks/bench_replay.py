@@ -0,0 +1,54 @@
+"""Headless replay speed of a long journaled game.
+
+Records a game in which every seat is played by the AI's turn policy
+(without rollouts) for the given number of rounds, then replays the
+journal with the per-turn state checks on, and checks the replay ends in
+the same state as the recorded game.
+
+Run from the repository root: python benchmarks/bench_replay.py [rounds]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from settings import players
+from engine import Game
+from ai import CityDistances, STRATEGIES, DEFAULT_STRATEGY, play_turn
+from journal import Journal, replay, state_digest
+
+def record(path, rounds, seed=0):
+    game = Game(seed, rng=random.Random(seed))
+    journal = Journal(path, game, seed)
+    rng = random.Random(seed)
+    distances = CityDistances(game.board)
+    for _ in range(rounds * len(players)):
+        if game.winner:
+            break
+        play_turn(game, game.current_player, rng, STRATEGIES[DEFAULT_STRATEGY], distances)
+        game.end_turn()
+    journal.close()
+    return game
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'journal.jsonl')
+        start = time.perf_counter()
+        recorded = record(path, rounds)
+        record_s = time.perf_counter() - start
+        with open(path) as f:
+            lines = sum(1 for _ in f)
+        start = time.perf_counter()
+        replayed = replay(path)
+        replay_s = time.perf_counter() - start
+    same = state_digest(replayed) == state_digest(recorded) and replayed.turn == recorded.turn and replayed.winner == recorded.winner
+    print(f"{recorded.turn - 1} rounds, {lines} journal lines, {len(recorded.units)} units at the end, winner {recorded.winner or 'none'}")
+    print(f"played and recorded in {record_s:.1f} s")
+    print(f"replayed in {replay_s:.2f} s, final state {'matches' if same else 'DIFFERS'}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""Save and load time for a large game (about 100,000 hexes and 10,000 units).
+
+Generates a big map once, spreads units over it (some carried by
+transports, some with goto paths), then times pack_game, writing the file,
+the whole save_game and load_game, and checks the loaded game matches.
+Autosaver.save is timed too: only snapshot_game runs on the caller's
+thread, the packing and writing on its worker.
+
+Run from the repository root: python benchmarks/bench_save.py [radius] [units]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from settings import players, map_params, max_fuel, capacity
+from engine import Game
+from units import get_allowed
+from savegame import Autosaver, snapshot_game, pack_game, write_save, save_game, load_game
+
+def big_game(radius, count, seed=0):
+    params = dict(map_params, circular_radius=radius, num_cities=radius * radius // 50)
+    game = Game(seed, params=params)
+    rng = random.Random(seed)
+    by_terrain = {}
+    for pos in game.grid:
+        if pos not in game.cities:
+            by_terrain.setdefault(game.terrain[pos], []).append(pos)
+    types = ['Infantry', 'Tank', 'Fighter', 'Destroyer', 'TransportShip']
+    transports = []
+    for _ in range(count):
+        utype = rng.choice(types)
+        if utype == 'Infantry' and transports and rng.random() < 0.2:
+            transport = rng.choice(transports)
+            loads = game.transport_loads[transport.id]
+            if len(loads) < capacity[transport.type]['max']:
+                unit = game.units.create(utype, transport.owner, transport.pos)
+                game.units.remove(unit)
+                loads.append(unit)
+                continue
+        terrain = rng.choice(sorted(get_allowed(utype) & by_terrain.keys()))
+        unit = game.units.create(utype, rng.choice(players), rng.choice(by_terrain[terrain]), 0, max_fuel.get(utype))
+        unit.hp = rng.randint(1, unit.max_hp)
+        if utype in capacity:
+            game.transport_loads[unit.id] = []
+            transports.append(unit)
+        if rng.random() < 0.1:
+            unit.path = [rng.choice(by_terrain[terrain]) for _ in range(5)]
+    return game
+
+def best_of(fn, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1e3, result
+
+def describe(game):
+    units = [(u.id, u.type, u.owner, u.pos, u.hp, u.fuel, u.path) for u in game.units]
+    loads = {tid: [u.id for u in loads] for tid, loads in game.transport_loads.items()}
+    return units, loads, game.city_owners, game.productions, game.terrain
+
+def main():
+    radius = int(sys.argv[1]) if len(sys.argv) > 1 else 167
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 10000
+    game = big_game(radius, count)
+    carried = sum(len(loads) for loads in game.transport_loads.values())
+    print(f"{len(game.grid)} hexes, {len(game.cities)} cities, {len(game.units)} units on the map, {carried} carried")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'save.npz')
+        snapshot_ms, _ = best_of(lambda: snapshot_game(game))
+        pack_ms, arrays = best_of(lambda: pack_game(game))
+        write_ms, _ = best_of(lambda: write_save(path, arrays))
+        save_ms, _ = best_of(lambda: save_game(path, game))
+        load_ms, loaded = best_of(lambda: load_game(path))
+        print(f"file      {os.path.getsize(path) / 1e6:7.2f} MB, round trip {'matches' if describe(loaded) == describe(game) else 'DIFFERS'}")
+        print(f"snapshot  {snapshot_ms:7.1f} ms")
+        print(f"pack      {pack_ms:7.1f} ms (snapshot included)")
+        print(f"write     {write_ms:7.1f} ms")
+        print(f"save      {save_ms:7.1f} ms")
+        print(f"load      {load_ms:7.1f} ms")
+        autosaver = Autosaver(os.path.join(tmp, 'autosave.npz'))
+        autosave_ms, _ = best_of(lambda: autosaver.save(game))
+        autosaver.close()
+        print(f"autosave  {autosave_ms:7.1f} ms on the caller's thread")
+
+if __name__ == '__main__':
+    main()
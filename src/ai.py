@@ -0,0 +1,299 @@
+import multiprocessing
+import os
+import pickle
+import random
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait
+import numpy as np
+from settings import players, unit_types, sea_units, capacity
+from engine import Game
+from board import PLAYER_CODES
+from battle_odds import battle_odds
+from hex_utils import hexes_in_range
+from units import get_allowed, get_reachable, find_path
+
+# Turn plans the controller chooses between: the least win chance worth
+# attacking at, and whether idle units head for cities or wander
+STRATEGIES = (
+    {'attack_odds': 0.35, 'expand': True},
+    {'attack_odds': 0.6, 'expand': True},
+    {'attack_odds': 0.85, 'expand': True},
+    {'attack_odds': 0.6, 'expand': False},
+)
+# Plan the opponents (and the player's later turns) follow in rollouts
+DEFAULT_STRATEGY = 1
+# Full rounds played out after the planned turn
+ROLLOUT_ROUNDS = 2
+ROLLOUT_BATCH = 4
+ODDS_TRIALS = 500
+CITY_VALUE = 3
+WIN_SCORE = 1000
+
+# Unit types the AI builds; it does not plan transport or fuel, so no
+# transports or aircraft
+PRODUCTION_WEIGHTS = {'Infantry': 4, 'Tank': 3, 'Destroyer': 1}
+
+def choose_production(game, city, rng, land=True):
+    """Pick a unit type for a city, weighted towards land units; only ships if not `land`.
+
+    Returns None when nothing is worth building there.
+    """
+    options = [u for u in unit_types if u in PRODUCTION_WEIGHTS and (land or u in sea_units) and (u not in sea_units or city in game.coastal_cities)]
+    if not options:
+        return None
+    return rng.choices(options, [PRODUCTION_WEIGHTS[u] for u in options])[0]
+
+def best_target(game, unit, attack_odds):
+    """Hex in range most worth attacking, or None: neutral cities for infantry, else the best odds above attack_odds."""
+    best, best_win = None, attack_odds
+    for pos in hexes_in_range(unit.pos, unit.range):
+        if pos not in game.grid or pos == unit.pos:
+            continue
+        if pos in game.cities and game.city_owners[pos] is None:
+            if unit.type == 'Infantry':
+                return pos
+            continue
+        defender = game.defender_at(unit, pos)
+        if defender is None:
+            continue
+        odds = battle_odds(unit, defender, game.terrain, ODDS_TRIALS)
+        if odds is not None and odds['win'] >= best_win:
+            best, best_win = pos, odds['win']
+    return best
+
+class CityDistances:
+    """Steps from every hex to every city for each set of terrain unit types may cross.
+
+    A table (one row per city, one column per grid index) is filled by
+    breadth-first search the first time a unit type with a new terrain set
+    is asked for, over the board's terrain mask for it plus the cities; each
+    turn then only takes the minimum over the rows of its goal cities.
+    """
+
+    def __init__(self, board):
+        self.board = board
+        self.grid = board.grid
+        self.cities = board.cities
+        self.row = {c: i for i, c in enumerate(self.cities)}
+        self.unreachable = len(board.grid)
+        self.tables = {}
+
+    def _table(self, utype):
+        grid = self.grid
+        passable = (self.board.terrain_mask(utype) | self.board.is_city).tolist()
+        neighbors = [[j for j in row if j >= 0 and passable[j]] for row in grid.neighbor_table.tolist()]
+        unreachable = self.unreachable
+        table = np.full((len(self.cities), len(grid)), unreachable, dtype=np.int32)
+        for i, city in enumerate(self.cities):
+            dist = [unreachable] * len(grid)
+            start = grid.index[city]
+            dist[start] = 0
+            frontier = deque([start])
+            while frontier:
+                j = frontier.popleft()
+                step = dist[j] + 1
+                for n in neighbors[j]:
+                    if dist[n] > step:
+                        dist[n] = step
+                        frontier.append(n)
+            table[i] = dist
+        return table
+
+    def field(self, goals, utype):
+        """List by grid index of steps to the nearest goal city for the unit type."""
+        allowed = frozenset(get_allowed(utype))
+        table = self.tables.get(allowed)
+        if table is None:
+            table = self.tables[allowed] = self._table(utype)
+        return table[[self.row[c] for c in goals]].min(axis=0).tolist()
+
+def play_turn(game, player, rng, strategy, distances):
+    """Play player's turn through the Game's actions, without ending it.
+
+    Used both on the live game and on rollout copies, so it must only
+    depend on the game, the rng, the strategy and the map's CityDistances.
+    Infantry head for any city they do not own, other units for enemy
+    cities, which they can besiege but not take.
+    """
+    index = game.grid.index
+    unowned = [c for c in game.cities if game.city_owners[c] != player]
+    land_field = distances.field(unowned, 'Infantry') if unowned else None
+    for city in game.cities:
+        if game.city_owners[city] == player and game.productions[city]['turns_left'] == 0:
+            utype = choose_production(game, city, rng, land_field is not None and land_field[index[city]] < distances.unreachable)
+            if utype:
+                game.set_production(city, utype)
+    fields = {}
+    for unit in game.units.owned_by(player):
+        if game.winner:
+            return
+        if unit not in game.units or unit.movement_left <= 0 or unit.sentry or unit.type in capacity:
+            continue
+        target = best_target(game, unit, strategy['attack_odds'])
+        if target is not None:
+            game.attack(unit, target)
+            continue
+        reachable = sorted(get_reachable(unit, game.grid, game.terrain, game.cities, game.city_owners, game.units, game.coastal_cities, game.transport_loads))
+        if not reachable:
+            continue
+        if strategy['expand']:
+            infantry = unit.type == 'Infantry'
+            key = (frozenset(get_allowed(unit.type)), infantry)
+            if key not in fields:
+                goals = [c for c in unowned if infantry or game.city_owners[c] is not None]
+                fields[key] = distances.field(goals, unit.type) if goals else None
+            field = fields[key]
+            if field is None:
+                continue
+            dest = min(reachable, key=lambda h: field[index[h]])
+            if field[index[dest]] >= field[index[unit.pos]]:
+                continue
+        else:
+            dest = rng.choice(reachable)
+        path = find_path(unit.pos, dest, unit, game.grid, game.terrain, game.cities, game.city_owners, game.units, game.transport_loads, capacity, game.coastal_cities)
+        if path:
+            game.move_unit(unit, path)
+
+def material(game, player):
+    return CITY_VALUE * sum(1 for c in game.cities if game.city_owners[c] == player) + sum(u.hp / u.max_hp for u in game.units.owned_by(player))
+
+def score(game, player):
+    """Player's material lead over the strongest opponent, or +-WIN_SCORE once the game is decided."""
+    if game.winner:
+        return WIN_SCORE if game.winner == player else -WIN_SCORE
+    return material(game, player) - max(material(game, p) for p in players if p != player)
+
+def pack_state(game):
+    """The parts of a game that change during play, pickled for rollouts."""
+    return pickle.dumps((game.city_owners, list(game.units), game.transport_loads, game.productions, game.city_hp, game.turn, game.current_player, game.attacked_cities, game.units.next_id))
+
+# Map of the game being played and its CityDistances, set once per worker process by _init_worker
+_static = None
+_distances = None
+
+def _init_worker(static, distances):
+    global _static, _distances
+    _static = static
+    _distances = distances
+
+def _rollouts(state, player, strategy, seeds):
+    """Scores after playing the strategy's turn and ROLLOUT_ROUNDS more rounds, one per seed."""
+    scores = []
+    for seed in seeds:
+        rng = random.Random(seed)
+        city_owners, units, transport_loads, productions, city_hp, turn, current, attacked, next_id = pickle.loads(state)
+        game = Game.from_state(*_static, city_owners, units, transport_loads, productions, city_hp, turn, current, attacked, rng, next_id)
+        play_turn(game, player, rng, STRATEGIES[strategy], _distances)
+        for _ in range(ROLLOUT_ROUNDS * len(players)):
+            if game.winner:
+                break
+            game.end_turn()
+            play_turn(game, game.current_player, rng, STRATEGIES[DEFAULT_STRATEGY], _distances)
+        scores.append(score(game, player))
+    return scores
+
+class AIController:
+    """Plays the AI seats by picking a strategy per turn with Monte Carlo rollouts.
+
+    Each turn the rollouts are cut into batches of ROLLOUT_BATCH seeds that
+    cycle through STRATEGIES; batch k always gets the same strategy and
+    seeds (derived from seed, the turn, the player and k), and scores are
+    summed in batch order, so a given number of batches always picks the
+    same plan. Batches run on a process pool of `workers` processes (one
+    per core by default, 0 runs them on one thread in this process) until `budget` seconds have passed
+    or `rollouts` have been played; pass a large budget with a rollout cap
+    for fully reproducible games. The map is sent to each worker once, the
+    dynamic state once per batch.
+
+    The search runs in the background: `begin` starts it, `ready` collects
+    finished batches without waiting, and `finish` plays the turn once it
+    is ready, so a UI can keep drawing meanwhile. `play` does all three.
+    """
+
+    def __init__(self, game, seats, seed=0, budget=1.0, rollouts=None, workers=None):
+        self.game = game
+        self.seats = set(seats)
+        self.seed = seed
+        self.budget = budget
+        self.max_rollouts = rollouts
+        self.workers = os.cpu_count() if workers is None else workers
+        self.search = None
+        self.distances = CityDistances(game.board)
+        static = (game.seed, game.grid, game.terrain, game.cities, game.coastal_cities, game.start_cities)
+        if self.workers:
+            # Spawn everywhere, as macOS and Windows do by default: forking would
+            # copy a process that may already run threads (the autosaver's)
+            self.executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('spawn'), initializer=_init_worker, initargs=(static, CityDistances(game.board)))
+        else:
+            _init_worker(static, self.distances)
+            self.executor = ThreadPoolExecutor(1)
+
+    def close(self):
+        self.executor.shutdown(cancel_futures=True)
+
+    def _batch(self, player, k):
+        seeds = np.random.SeedSequence([self.seed, self.game.turn, PLAYER_CODES[player], k]).generate_state(ROLLOUT_BATCH)
+        return k % len(STRATEGIES), [int(s) for s in seeds]
+
+    def begin(self, player=None):
+        """Start the rollouts for player's turn (the current player's by default) without waiting."""
+        self.search = {
+            'player': player or self.game.current_player,
+            'state': pack_state(self.game),
+            'totals': [0.0] * len(STRATEGIES),
+            'counts': [0] * len(STRATEGIES),
+            'deadline': time.perf_counter() + self.budget,
+            'pending': deque(),
+            'batches': 0,
+        }
+        self._submit()
+
+    def _submit(self):
+        # Keep two batches per worker queued while the budget and the rollout cap allow
+        search = self.search
+        pending = search['pending']
+        while len(pending) < 2 * max(1, self.workers) and time.perf_counter() < search['deadline'] and (self.max_rollouts is None or search['batches'] * ROLLOUT_BATCH < self.max_rollouts):
+            strategy, seeds = self._batch(search['player'], search['batches'])
+            pending.append((strategy, self.executor.submit(_rollouts, search['state'], search['player'], strategy, seeds)))
+            search['batches'] += 1
+
+    def ready(self):
+        """Take in the batches that have finished, in order, and queue more; True once the search is over."""
+        search = self.search
+        pending = search['pending']
+        while pending and pending[0][1].done():
+            strategy, future = pending.popleft()
+            scores = future.result()
+            search['totals'][strategy] += sum(scores)
+            search['counts'][strategy] += len(scores)
+            self._submit()
+        return not pending
+
+    def results(self):
+        """Mean rollout score per strategy index of the search so far, plus the number of rollouts played."""
+        totals, counts = self.search['totals'], self.search['counts']
+        means = {i: totals[i] / counts[i] for i in range(len(STRATEGIES)) if counts[i]}
+        return means, sum(counts)
+
+    def evaluate(self, player):
+        """Run a whole search for player and return its results."""
+        self.begin(player)
+        while not self.ready():
+            wait([self.search['pending'][0][1]])
+        return self.results()
+
+    def finish(self):
+        """Play the searched turn (without ending it); returns the strategy used and rollouts played."""
+        player = self.search['player']
+        means, played = self.results()
+        self.search = None
+        strategy = max(means, key=lambda i: (means[i], -i)) if means else DEFAULT_STRATEGY
+        rng = random.Random(int(np.random.SeedSequence([self.seed, self.game.turn, PLAYER_CODES[player]]).generate_state(1)[0]))
+        play_turn(self.game, player, rng, STRATEGIES[strategy], self.distances)
+        return strategy, played
+
+    def play(self):
+        """Search and play the current player's turn (without ending it); returns the strategy used and rollouts played."""
+        self.evaluate(self.game.current_player)
+        return self.finish()
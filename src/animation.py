@@ -0,0 +1,111 @@
+from collections import deque
+import pygame
+from settings import RED
+from hex_utils import axial_to_pixel
+from rendering import draw_hex_border
+
+ANIMATION_SPEEDS = (1, 2, 4)
+
+class Animation:
+    """One timed effect; `data` holds what its kind needs to draw."""
+    __slots__ = ('kind', 'duration', 'elapsed', 'data', 'on_start', 'on_finish')
+
+    def __init__(self, kind, duration, data, on_start=None, on_finish=None):
+        self.kind = kind
+        self.duration = duration
+        self.elapsed = 0
+        self.data = data
+        self.on_start = on_start
+        self.on_finish = on_finish
+
+    @property
+    def progress(self):
+        return min(1.0, self.elapsed / self.duration) if self.duration else 1.0
+
+class Animator:
+    """FIFO queue of presentation effects, advanced by the main loop's frame time.
+
+    The rules have already been applied when an effect is queued; effects
+    only decide how units and attacks are shown meanwhile. Effects play one
+    after another, `speed` scales how fast time passes and `skip`
+    fast-forwards through everything still queued.
+
+    Kinds: 'move' (unit, src, dst), 'strike' (src, dst) and 'banner' (surface).
+    """
+
+    def __init__(self):
+        self.queue = deque()
+        self.speed_index = 0
+
+    @property
+    def speed(self):
+        return ANIMATION_SPEEDS[self.speed_index]
+
+    @property
+    def busy(self):
+        return bool(self.queue)
+
+    def add(self, kind, duration, on_start=None, on_finish=None, **data):
+        self.queue.append(Animation(kind, duration, data, on_start, on_finish))
+
+    def cycle_speed(self):
+        self.speed_index = (self.speed_index + 1) % len(ANIMATION_SPEEDS)
+
+    def skip(self):
+        """Finish every queued effect now, still running their callbacks."""
+        while self.queue:
+            animation = self.queue.popleft()
+            if animation.on_start:
+                animation.on_start()
+            if animation.on_finish:
+                animation.on_finish()
+
+    def update(self, dt):
+        """Advance by dt milliseconds of frame time, carrying leftover time into the next effect."""
+        dt *= self.speed
+        while self.queue:
+            current = self.queue[0]
+            if current.elapsed == 0 and current.on_start:
+                current.on_start()
+                current.on_start = None
+            current.elapsed += dt
+            if current.elapsed < current.duration:
+                break
+            dt = current.elapsed - current.duration
+            self.queue.popleft()
+            if current.on_finish:
+                current.on_finish()
+            if dt <= 0:
+                break
+
+    def unit_positions(self):
+        """Fractional axial positions for units whose moves are still being shown.
+
+        The moving unit is interpolated along its current step; units with
+        moves further down the queue wait at the start of their first one.
+        """
+        positions = {}
+        for i, animation in enumerate(self.queue):
+            if animation.kind != 'move':
+                continue
+            unit_id = animation.data['unit'].id
+            if unit_id in positions:
+                continue
+            (sq, sr), (dq, dr) = animation.data['src'], animation.data['dst']
+            t = animation.progress if i == 0 else 0.0
+            positions[unit_id] = (sq + (dq - sq) * t, sr + (dr - sr) * t)
+        return positions
+
+    def draw(self, screen, zoom, cam_x, cam_y, screen_width, screen_height):
+        """Draw the effect in progress on top of the board."""
+        if not self.queue:
+            return
+        current = self.queue[0]
+        if current.kind == 'strike':
+            sx, sy = axial_to_pixel(*current.data['src'], zoom, cam_x, cam_y, screen_width, screen_height)
+            dx, dy = axial_to_pixel(*current.data['dst'], zoom, cam_x, cam_y, screen_width, screen_height)
+            draw_hex_border(screen, dx, dy, RED, 5, zoom)
+            pygame.draw.line(screen, RED, (sx, sy), (dx, dy), 5)
+        elif current.kind == 'banner':
+            surface = current.data['surface']
+            screen.blit(surface, (screen_width // 2 - surface.get_width() // 2, screen_height // 2 - surface.get_height() // 2))
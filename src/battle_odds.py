@@ -0,0 +1,83 @@
+from functools import lru_cache
+import numpy as np
+from settings import min_city_hp, terrain_bonuses, battle_luck, attack_factor, defense_factor, chip_damage, chip_chance
+
+# Battles that have not ended after this many exchanges are counted as unresolved
+MAX_ROUNDS = 1000
+
+def _strike_damage(rng, attack, defense, bonus, n):
+    """Damage of n independent strikes; the NumPy twin of Game._damage."""
+    lo, hi = battle_luck
+    att_mod = rng.uniform(lo, hi, n)
+    def_mod = rng.uniform(lo, hi, n)
+    # attack * att_mod * attack_factor - defense * def_mod * bonus * defense_factor, in place
+    att_mod *= attack
+    att_mod *= attack_factor
+    def_mod *= defense
+    def_mod *= bonus
+    def_mod *= defense_factor
+    att_mod -= def_mod
+    damage = att_mod.astype(np.int64)  # truncates toward zero like int()
+    np.maximum(damage, 0, out=damage)
+    zero = np.flatnonzero(damage == 0)
+    damage[zero[rng.random(zero.size) < chip_chance]] = chip_damage
+    return damage
+
+@lru_cache(maxsize=4096)
+def simulate_battle(att_hp, att_attack, att_defense, def_hp, def_attack, def_defense, def_bonus, siege, trials=20000, seed=0):
+    """Fight `trials` copies of one battle at once and summarise the results.
+
+    Mirrors Game.battle: the attacker strikes, then the surviving defender
+    strikes back, until one side is destroyed or (in a siege by a non-infantry
+    unit) the city is down to min_city_hp. Returns a dict with the
+    probabilities 'win' (defender destroyed or city taken), 'loss' (attacker
+    destroyed) and 'stalled' (siege stopped at min_city_hp), plus
+    'attacker_hp' / 'defender_hp' arrays giving the probability of each
+    remaining HP value and their means.
+    """
+    rng = np.random.default_rng(seed)
+    a_hp = np.full(trials, att_hp, dtype=np.int64)
+    d_hp = np.full(trials, def_hp, dtype=np.int64)
+    active = np.arange(trials)
+    for _ in range(MAX_ROUNDS):
+        if not active.size:
+            break
+        hit = d_hp[active] - _strike_damage(rng, att_attack, def_defense, def_bonus, active.size)
+        if siege:
+            hit = np.maximum(min_city_hp, hit)
+        d_hp[active] = hit
+        # Defenders that are gone (or at min_city_hp in a siege) do not strike back
+        active = active[hit > (min_city_hp if siege else 0)]
+        a_hp[active] -= _strike_damage(rng, def_attack, att_defense, 1.0, active.size)
+        active = active[a_hp[active] > 0]
+    a_dead = a_hp <= 0
+    d_dead = d_hp <= 0
+    # A mutual kill leaves the attacker alive on 1 HP
+    a_hp[a_dead & d_dead] = 1
+    a_hp = np.maximum(a_hp, 0)
+    d_hp = np.maximum(d_hp, 0)
+    odds = {
+        'win': float(d_dead.mean()),
+        'loss': float((a_dead & ~d_dead).mean()),
+        'stalled': float((~a_dead & ~d_dead).mean()),
+        'attacker_hp': np.bincount(a_hp, minlength=max(att_hp, 0) + 1) / trials,
+        'defender_hp': np.bincount(d_hp, minlength=max(def_hp, 0) + 1) / trials,
+        'mean_attacker_hp': float(a_hp.mean()),
+        'mean_defender_hp': float(d_hp.mean()),
+    }
+    odds['attacker_hp'].flags.writeable = False
+    odds['defender_hp'].flags.writeable = False
+    return odds
+
+def battle_odds(attacker, defender, terrain, trials=20000):
+    """Odds of attacker fighting defender (a unit or CityDefender) on its current hex.
+
+    Results are cached per (attacker stats, defender stats, terrain bonus),
+    so repeated queries cost a dict lookup. Returns None for a siege the
+    rules would refuse (city already at min_city_hp).
+    """
+    siege = defender.type == 'City' and attacker.type != 'Infantry'
+    if siege and defender.hp <= min_city_hp:
+        return None
+    bonus = terrain_bonuses.get(terrain[defender.pos], {'defense': 1.0})['defense']
+    return simulate_battle(attacker.hp, attacker.attack, attacker.defense, defender.hp, defender.attack, defender.defense, bonus, siege, trials)
@@ -0,0 +1,165 @@
+import numpy as np
+from settings import players, unit_types, terrain_types
+from units import get_allowed
+
+TERRAIN_CODES = {t: i for i, t in enumerate(terrain_types)}
+PLAYER_CODES = {p: i for i, p in enumerate(players)}
+UNIT_TYPE_CODES = {t: i for i, t in enumerate(unit_types)}
+NO_OWNER = -1
+
+def owner_codes(owners) -> np.ndarray:
+    """Convert an iterable of player names (or None) to int8 player codes."""
+    return np.fromiter((PLAYER_CODES.get(o, NO_OWNER) for o in owners), dtype=np.int8)
+
+class Board:
+    """Struct-of-arrays view of the board over the HexGrid dense index.
+
+    Every hex has an int8 terrain code; cities carry an owner code (NO_OWNER
+    when neutral) and HP; units are flattened into parallel columns. The
+    dict-based state stays authoritative for the rules: a Game builds its
+    board with `from_state`, keeps the city arrays current through
+    `set_city`, and unit columns are a snapshot refreshed by `sync_units`.
+    Adjacency to enemies changes with every move, so it is answered by
+    ZoneOfControl, which is built from these columns and then patched.
+    """
+
+    def __init__(self, grid, terrain: np.ndarray, cities: list = ()):
+        self.grid = grid
+        self.terrain = np.asarray(terrain, dtype=np.int8)
+        n = len(grid)
+        self.cities = list(cities)
+        self.city_index = np.array([grid.index[c] for c in self.cities], dtype=np.intp)
+        self.is_city = np.zeros(n, dtype=bool)
+        self.is_city[self.city_index] = True
+        self.city_owner = np.full(n, NO_OWNER, dtype=np.int8)
+        self.city_hp = np.zeros(n, dtype=np.int16)
+        self.sync_units(())
+
+    @classmethod
+    def from_state(cls, grid, terrain: dict, cities: list, city_owners: dict, city_hp: dict, units) -> 'Board':
+        """Build a board from the dict-based game state."""
+        codes = np.fromiter((TERRAIN_CODES[t] for t in map(terrain.__getitem__, grid.coords)), dtype=np.int8, count=len(grid))
+        board = cls(grid, codes, cities)
+        board.sync_cities(city_owners, city_hp)
+        board.sync_units(units)
+        return board
+
+    def sync_cities(self, city_owners: dict, city_hp: dict):
+        """Refresh city owners and HP from their dicts."""
+        self.city_owner[self.city_index] = owner_codes(city_owners[c] for c in self.cities)
+        self.city_hp[self.city_index] = np.fromiter((city_hp[c] for c in self.cities), dtype=np.int16, count=len(self.cities))
+
+    def set_city(self, pos, owner: str, hp: int):
+        """Record one city's owner and HP after a capture or a siege."""
+        i = self.grid.index[pos]
+        self.city_owner[i] = PLAYER_CODES.get(owner, NO_OWNER)
+        self.city_hp[i] = hp
+
+    def sync_units(self, units):
+        """Refresh the unit columns from an iterable of units."""
+        units = list(units)
+        count = len(units)
+        index = self.grid.index
+        self.unit_id = np.fromiter((u.id for u in units), dtype=np.int32, count=count)
+        self.unit_pos = np.fromiter((index[u.pos] for u in units), dtype=np.intp, count=count)
+        self.unit_owner = np.fromiter((PLAYER_CODES[u.owner] for u in units), dtype=np.intp, count=count)
+        self.unit_type = np.fromiter((UNIT_TYPE_CODES[u.type] for u in units), dtype=np.int8, count=count)
+        self.unit_hp = np.fromiter((u.hp for u in units), dtype=np.int16, count=count)
+
+    def adjacent_to(self, mask: np.ndarray) -> np.ndarray:
+        """Mask of hexes with at least one neighbour inside mask."""
+        # Off-map neighbours are -1 in the table and hit the trailing False
+        padded = np.append(mask, False)
+        return padded[self.grid.neighbor_table].any(axis=1)
+
+    def terrain_mask(self, utype: str) -> np.ndarray:
+        """Mask of hexes whose terrain the unit type may enter."""
+        codes = [TERRAIN_CODES[t] for t in get_allowed(utype)]
+        return np.isin(self.terrain, codes)
+
+    def coastal_mask(self) -> np.ndarray:
+        """Mask of land hexes bordering water."""
+        return (self.terrain == TERRAIN_CODES['land']) & self.adjacent_to(self.terrain == TERRAIN_CODES['water'])
+
+    def city_counts(self) -> np.ndarray:
+        """Number of cities held by each player, indexed by player code."""
+        owners = self.city_owner[self.city_index]
+        return np.bincount(owners[owners >= 0], minlength=len(players))
+
+
+class ZoneOfControl:
+    """Per-player counts of hostile neighbours for every hex, kept up to date incrementally.
+
+    `enemy_units[p][i]` counts units not owned by player code p on the hexes
+    next to hex i, and `hostile_cities[p][i]` counts cities there that p does
+    not own (neutral ones included). They start from a Board's unit and city
+    columns; after that a registry with `zone` set reports every
+    registration, move and removal; city captures go through `set_city_owner`.
+    Each adjacency question is then a single lookup. The counts are plain
+    lists because updates touch six entries at a time, where NumPy indexing
+    costs more than it saves; the initial counts are built with NumPy.
+    """
+
+    def __init__(self, board: Board):
+        self.grid = board.grid
+        self._neighbor_index = [None] * len(board.grid)
+        self.enemy_units = self._hostile_counts(board.unit_owner, board.unit_pos)
+        # Neutral cities get their own row after the players' so they count as hostile to everyone
+        city_codes = board.city_owner[board.city_index].astype(np.intp)
+        city_codes[city_codes == NO_OWNER] = len(players)
+        self.hostile_cities = self._hostile_counts(city_codes, board.city_index)
+
+    def _hostile_counts(self, owners, hexes):
+        """Per-player lists counting the items (given by owner code and grid index) next to each hex that the player does not own."""
+        n = len(self.grid)
+        # Tally each item on its six neighbours; off-map neighbours are -1 and land in a spare column
+        neighbors = self.grid.neighbor_table[hexes] % (n + 1)
+        near = np.bincount((owners[:, None] * (n + 1) + neighbors).ravel(), minlength=(len(players) + 1) * (n + 1))
+        near = near.reshape(len(players) + 1, n + 1)[:, :n]
+        total = near.sum(axis=0)
+        return [(total - near[code]).tolist() for code in range(len(players))]
+
+    def _neighbors(self, pos):
+        i = self.grid.index[pos]
+        found = self._neighbor_index[i]
+        if found is None:
+            found = self._neighbor_index[i] = [j for j in self.grid.neighbor_table[i].tolist() if j >= 0]
+        return found
+
+    def _bump_units(self, owner, pos, delta):
+        neighbors = self._neighbors(pos)
+        for p, code in PLAYER_CODES.items():
+            if p != owner:
+                counts = self.enemy_units[code]
+                for j in neighbors:
+                    counts[j] += delta
+
+    def add_unit(self, unit):
+        self._bump_units(unit.owner, unit.pos, 1)
+
+    def remove_unit(self, unit):
+        self._bump_units(unit.owner, unit.pos, -1)
+
+    def move_unit(self, unit, src):
+        """Account for a unit that has moved from src to its current position."""
+        self._bump_units(unit.owner, src, -1)
+        self._bump_units(unit.owner, unit.pos, 1)
+
+    def set_city_owner(self, pos, previous, owner, new=False):
+        """Account for a city passing from previous to owner (or appearing, with new=True)."""
+        neighbors = self._neighbors(pos)
+        for p, code in PLAYER_CODES.items():
+            delta = (owner != p) - (0 if new else previous != p)
+            if delta:
+                counts = self.hostile_cities[code]
+                for j in neighbors:
+                    counts[j] += delta
+
+    def enemy_near(self, pos, player: str) -> bool:
+        """Whether another player's unit stands next to pos."""
+        return self.enemy_units[PLAYER_CODES[player]][self.grid.index[pos]] > 0
+
+    def hostile_near(self, pos, player: str) -> bool:
+        """Whether another player's unit or a city the player does not own is next to pos."""
+        code, i = PLAYER_CODES[player], self.grid.index[pos]
+        return self.enemy_units[code][i] > 0 or self.hostile_cities[code][i] > 0
@@ -0,0 +1,497 @@
+import functools
+import random
+from hex_utils import hex_distance, get_neighbors
+from units import CityDefender, PathCache, UnitRegistry, get_allowed, get_reachable_distances, is_loadable_transport_hex, is_hex_occupied
+from players import assign_starting_cities_and_units
+from map_cache import load_or_generate_map
+from board import PLAYER_CODES, Board, ZoneOfControl
+from settings import players, unit_stats, movements, max_fuel, capacity, max_stack, sea_units, unit_types, costs, city_max_hp, min_city_hp, terrain_bonuses, map_params, battle_luck, attack_factor, defense_factor, chip_damage, chip_chance
+
+def remove_unit_and_loads(unit, units, transport_loads):
+    """Remove a unit and its loaded units from the game."""
+    if unit in units:
+        units.remove(unit)
+    # Loaded units are not on the map, so they go down with the transport
+    transport_loads.pop(unit.id, None)
+
+def journaled(method):
+    """Mark a player action: calls from outside the Game are written to its journal.
+
+    Actions that call other actions (end_turn walking goto paths) record
+    only the outer call, since replaying it repeats the inner ones.
+    """
+    @functools.wraps(method)
+    def action(self, *args):
+        if self.journal is None or self._acting:
+            return method(self, *args)
+        self.journal.record(method.__name__, args)
+        self._acting = True
+        try:
+            return method(self, *args)
+        finally:
+            self._acting = False
+    return action
+
+class Game:
+    """Game state and rules, with no rendering, input or timing.
+
+    Actions validate against the rules, change the state and report what
+    happened to every subscribed listener as `listener(kind, data)`. Kinds and
+    their data:
+
+    - 'moved': unit, src, dst
+    - 'loaded' / 'unloaded': unit, transport
+    - 'strike': attacker, target, damage (one blow of a battle, either way)
+    - 'destroyed': unit, reason ('fuel', 'battle', 'capture' or 'garrison')
+    - 'captured': pos, owner, previous
+    - 'produced': unit, city
+    - 'production_set': city, unit_type
+    - 'sentried' / 'woken': unit
+    - 'turn_started': player, turn
+    - 'won': player
+    - 'rejected': reason (the action was not allowed and nothing changed)
+
+    Battles draw from `rng`, so a seeded rng makes a whole game reproducible.
+    With `journal` set (a journal.Journal), every player action is recorded
+    so the game can be replayed.
+    """
+
+    def __init__(self, seed=None, cache_dir=None, params=None, rng=random):
+        self.rng = rng
+        self.seed = seed if seed is not None else random.randrange(2 ** 32)
+        self.grid, self.terrain, self.cities, self.coastal_cities, start_cities = load_or_generate_map(self.seed, len(players), params or map_params, cache_dir)
+        self.city_owners, self.units, self.transport_loads, self.productions, self.city_hp, self.start_cities = assign_starting_cities_and_units(self.cities, self.coastal_cities, players, self.grid, unit_stats, movements, start_cities)
+        self._start()
+
+    @classmethod
+    def from_state(cls, seed, grid, terrain, cities, coastal_cities, start_cities, city_owners, units, transport_loads, productions, city_hp, turn=1, current_player=players[0], attacked_cities=(), rng=random, next_id=1):
+        """Build a game around existing state (a rollout copy or a saved game) instead of a new map.
+
+        Takes the structures a Game keeps, as unpacked by savegame or
+        ai.pack_state: the map (a HexGrid and its terrain dict), the city
+        list, set and dicts keyed by hex, `units` as Unit objects on the map
+        in registration order, and `transport_loads` keyed by transport ID.
+        All are used as given, not copied. `next_id` keeps new units from
+        reusing the stable IDs of units that are carried rather than on the
+        map, so journals and saves keep naming the same units.
+        """
+        game = cls.__new__(cls)
+        game.rng = rng
+        game.seed = seed
+        game.grid, game.terrain, game.cities, game.coastal_cities, game.start_cities = grid, terrain, cities, coastal_cities, start_cities
+        game.city_owners, game.transport_loads, game.productions, game.city_hp = city_owners, transport_loads, productions, city_hp
+        game.units = UnitRegistry(units, next_id)
+        game._start(turn, current_player, attacked_cities)
+        return game
+
+    def _start(self, turn=1, current_player=players[0], attacked_cities=()):
+        self.board = Board.from_state(self.grid, self.terrain, self.cities, self.city_owners, self.city_hp, self.units)
+        self.zone = ZoneOfControl(self.board)
+        self.units.zone = self.zone
+        self.turn = turn
+        self.current_player = current_player
+        self.attacked_cities = set(attacked_cities)
+        self.winner = None
+        self.path_cache = PathCache()
+        self.listeners = []
+        self.journal = None
+        self._acting = False
+
+    def subscribe(self, listener):
+        """Call listener(kind, data) for every event from now on."""
+        self.listeners.append(listener)
+
+    def emit(self, kind, **data):
+        for listener in self.listeners:
+            listener(kind, data)
+
+    def _reject(self, reason):
+        self.emit('rejected', reason=reason)
+        return False
+
+    def _destroy(self, unit, reason):
+        remove_unit_and_loads(unit, self.units, self.transport_loads)
+        self.emit('destroyed', unit=unit, reason=reason)
+
+    def _load(self, unit, transport):
+        self.transport_loads.setdefault(transport.id, []).append(unit)
+        self.units.remove(unit)
+        unit.movement_left = 0
+        self.emit('loaded', unit=unit, transport=transport)
+
+    def _capture(self, pos, owner, keep=None, reset_hp=False):
+        """Hand a city to owner, destroying every other unit on its hex."""
+        previous = self.city_owners[pos]
+        for u in [u for u in self.units.at(pos) if u is not keep]:
+            self._destroy(u, 'capture')
+        self.city_owners[pos] = owner
+        self.zone.set_city_owner(pos, previous, owner)
+        self.units.mark_changed()
+        if reset_hp:
+            self.city_hp[pos] = city_max_hp
+        self.board.set_city(pos, owner, self.city_hp[pos])
+        self.emit('captured', pos=pos, owner=owner, previous=previous)
+        self.check_win()
+
+    def check_win(self):
+        """Record and announce a player owning every city; returns the winner or None."""
+        if self.winner is None:
+            owned = self.board.city_counts()
+            for player in players:
+                if owned[PLAYER_CODES[player]] == len(self.cities):
+                    self.winner = player
+                    self.emit('won', player=player)
+                    break
+        return self.winner
+
+    @journaled
+    def move_unit(self, unit, path):
+        """Move a unit straight to the end of `path`, loading it if a friendly transport is there.
+
+        The path must step from hex to neighbouring hex through hexes the
+        unit could reach this turn, so it can neither jump nor pass enemies.
+        """
+        if unit not in self.units or unit.owner != self.current_player:
+            return self._reject('owner')
+        if not path:
+            return self._reject('path')
+        dist = len(path)
+        if dist > unit.movement_left:
+            return self._reject('movement')
+        if unit.type in ['Fighter', 'TransportPlane'] and unit.fuel is not None and dist > unit.fuel:
+            return self._reject('fuel')
+        reachable = get_reachable_distances(unit, self.grid, self.terrain, self.cities, self.city_owners, self.units, self.coastal_cities, self.transport_loads)
+        prev = unit.pos
+        for step in path:
+            if step not in reachable or hex_distance(prev, step) != 1:
+                return self._reject('path')
+            prev = step
+        dest = path[-1]
+        transport = next((u for u in self.units.at(dest) if u.type in capacity and u.owner == unit.owner), None)
+        if transport:
+            if unit.type in capacity[transport.type]['allowed'] and len(self.transport_loads.get(transport.id, [])) < capacity[transport.type]['max']:
+                self._load(unit, transport)
+                return True
+            return self._reject('transport')
+        src = unit.pos
+        self.units.move(unit, dest)
+        unit.movement_left -= dist
+        unit.did_move = True
+        for loaded_unit in self.transport_loads.get(unit.id, []):
+            loaded_unit.pos = unit.pos
+        self.emit('moved', unit=unit, src=src, dst=dest)
+        if unit.type in ['Fighter', 'TransportPlane'] and unit.fuel is not None:
+            unit.fuel -= dist
+            if unit.fuel <= 0:
+                self._destroy(unit, 'fuel')
+                return True
+        if dest in self.cities and self.city_owners[dest] != unit.owner:
+            self._capture(dest, unit.owner, keep=unit)
+        return True
+
+    @journaled
+    def order_path(self, unit, path):
+        """Give a unit a goto order and start walking it."""
+        if unit not in self.units or unit.owner != self.current_player:
+            return self._reject('owner')
+        if unit.type in ['Fighter', 'TransportPlane'] and unit.fuel is not None and len(path) > unit.fuel:
+            return self._reject('fuel')
+        unit.path = list(path)
+        self.move_along_path(unit)
+        return True
+
+    @journaled
+    def cancel_path(self, unit):
+        """Drop a unit's goto order."""
+        unit.path = None
+
+    @journaled
+    def move_along_path(self, unit):
+        """Walk a unit along its goto path as far as its movement allows.
+
+        The order is dropped when the unit starts next to an enemy, or when
+        the next hex is blocked. Returns True if the unit moved.
+        """
+        if not unit.path:
+            return False
+        if self.zone.hostile_near(unit.pos, unit.owner):
+            unit.path = None
+            return False
+        moved = 0
+        allowed = get_allowed(unit.type)
+        is_sea_unit = unit.type in sea_units
+        terrain, cities, city_owners = self.terrain, self.cities, self.city_owners
+        while moved < unit.movement_left and unit.path:
+            next_hex = unit.path[0]
+            allow_city = is_sea_unit and next_hex in self.coastal_cities and city_owners.get(next_hex) == unit.owner
+            loadable = is_loadable_transport_hex(next_hex, unit, self.units, self.transport_loads, terrain, cities, city_owners, self.grid)
+            occupied = is_hex_occupied(next_hex, unit.owner, self.units, cities, city_owners, max_stack)
+            if (occupied and not loadable) or (terrain[next_hex] not in allowed and not loadable and not allow_city) or (next_hex in cities and city_owners[next_hex] is None):
+                unit.path = None
+                break
+            src = unit.pos
+            self.units.move(unit, next_hex)
+            unit.path.pop(0)
+            moved += 1
+            unit.did_move = True
+            for loaded_unit in self.transport_loads.get(unit.id, []):
+                loaded_unit.pos = unit.pos
+            if unit.type == 'AirCarrier':
+                for loaded_unit in self.transport_loads.get(unit.id, []):
+                    if loaded_unit.type == 'Fighter':
+                        loaded_unit.fuel = max_fuel.get('Fighter', loaded_unit.fuel)
+            self.emit('moved', unit=unit, src=src, dst=next_hex)
+            if unit.type in ['Fighter', 'TransportPlane'] and unit.fuel is not None:
+                unit.fuel -= 1
+                if unit.fuel <= 0:
+                    self._destroy(unit, 'fuel')
+                    return True
+            if unit.pos in cities and city_owners[unit.pos] != unit.owner:
+                self._capture(unit.pos, unit.owner, keep=unit)
+        unit.movement_left -= moved
+        if unit.path is not None and not unit.path:
+            unit.path = None
+        # Board a friendly transport waiting on the final hex
+        if is_loadable_transport_hex(unit.pos, unit, self.units, self.transport_loads, terrain, cities, city_owners, self.grid):
+            transport = next((u for u in self.units.at(unit.pos) if u.type in capacity and unit.type in capacity[u.type]['allowed'] and u.owner == unit.owner and len(self.transport_loads.get(u.id, [])) < capacity[u.type]['max']), None)
+            if transport:
+                self._load(unit, transport)
+        return moved > 0
+
+    def defender_at(self, unit, target):
+        """The unit or CityDefender that unit would fight at target, or None (neutral cities are not fought)."""
+        if target in self.cities and self.city_owners[target] != unit.owner:
+            if self.city_owners[target] is None:
+                return None
+            return CityDefender(target, self.city_owners[target], self.city_hp[target])
+        return next((u for u in self.units.at(target) if u.owner != unit.owner), None)
+
+    @journaled
+    def attack(self, unit, target):
+        """Attack the city or enemy stack at target; infantry take neutral cities outright."""
+        if unit.movement_left <= 0 or hex_distance(unit.pos, target) > unit.range:
+            return self._reject('range')
+        if target in self.cities and self.city_owners[target] is None:
+            if unit.type != 'Infantry':
+                return self._reject('neutral_city')
+            self._capture(target, unit.owner)
+            self._destroy(unit, 'garrison')
+            return True
+        defender = self.defender_at(unit, target)
+        if defender is None:
+            return self._reject('no_target')
+        return self.battle(unit, defender)
+
+    def _damage(self, attack, defense, bonus=1.0):
+        # battle_odds.simulate_battle vectorises this formula; keep the two in step
+        att_mod = self.rng.uniform(*battle_luck)
+        def_mod = self.rng.uniform(*battle_luck)
+        damage = max(0, int(attack * att_mod * attack_factor - defense * def_mod * bonus * defense_factor))
+        if damage == 0 and self.rng.random() < chip_chance:
+            damage = chip_damage
+        return damage
+
+    def battle(self, attacker, defender):
+        """Fight until one side falls; only infantry can take a city below min_city_hp."""
+        range_attack = hex_distance(attacker.pos, defender.pos)
+        is_city = defender.type == 'City'
+        if is_city:
+            self.attacked_cities.add(defender.pos)
+        is_infantry = attacker.type == 'Infantry'
+        siege = is_city and not is_infantry
+        if siege and defender.hp <= min_city_hp:
+            return self._reject('city_min_hp')
+        def_bonus = terrain_bonuses.get(self.terrain[defender.pos], {'defense': 1.0})['defense']
+        while attacker.hp > 0 and (defender.hp > 0 or (siege and defender.hp > min_city_hp)):
+            damage = self._damage(attacker.attack, defender.defense, def_bonus)
+            if siege:
+                defender.hp = max(min_city_hp, defender.hp - damage)
+            else:
+                defender.hp -= damage
+            self.emit('strike', attacker=attacker, target=defender, damage=damage)
+            if defender.hp <= 0 or (siege and defender.hp <= min_city_hp):
+                break
+            # The counterattack gets no terrain bonus
+            damage = self._damage(defender.attack, attacker.defense)
+            attacker.hp -= damage
+            self.emit('strike', attacker=defender, target=attacker, damage=damage)
+        if attacker.hp <= 0 and defender.hp <= 0:
+            attacker.hp = 1
+            if not is_city:
+                self._destroy(defender, 'battle')
+        elif attacker.hp <= 0:
+            self._destroy(attacker, 'battle')
+        elif defender.hp <= 0 and not is_city:
+            self._destroy(defender, 'battle')
+        if attacker.hp > 0 and defender.hp <= 0 and range_attack == 1 and self.terrain[defender.pos] in get_allowed(attacker.type) and not is_city:
+            if defender.pos not in self.cities or attacker.type == 'Infantry':
+                src = attacker.pos
+                self.units.move(attacker, defender.pos)
+                self.emit('moved', unit=attacker, src=src, dst=defender.pos)
+                if attacker.pos in self.cities and self.city_owners[attacker.pos] != attacker.owner:
+                    self._capture(attacker.pos, attacker.owner, keep=attacker, reset_hp=True)
+                    self._destroy(attacker, 'garrison')
+        attacker.movement_left = max(0, attacker.movement_left - 1)
+        if is_city:
+            self.city_hp[defender.pos] = defender.hp
+            self.board.set_city(defender.pos, self.city_owners[defender.pos], defender.hp)
+            if defender.hp <= 0 and attacker in self.units and is_infantry:
+                self._capture(defender.pos, attacker.owner, keep=attacker, reset_hp=True)
+                self._destroy(attacker, 'garrison')
+        self.check_win()
+        return True
+
+    @journaled
+    def load(self, transport, utype):
+        """Load a unit of utype into a transport: planes from their city, ships from an own city on or next to them."""
+        loads = self.transport_loads.get(transport.id, [])
+        if transport.type not in ['TransportShip', 'TransportPlane'] or utype not in capacity[transport.type]['allowed'] or len(loads) >= capacity[transport.type]['max']:
+            return self._reject('transport')
+        pos = transport.pos
+        if transport.type == 'TransportPlane':
+            load_pos = pos if pos in self.cities else None
+        elif pos in self.cities and self.city_owners[pos] == transport.owner:
+            load_pos = pos
+        else:
+            load_pos = next((n for n in get_neighbors(*pos, self.grid) if n in self.cities and self.city_owners[n] == transport.owner), None)
+        if load_pos is None:
+            return self._reject('no_city')
+        cargo = next((u for u in self.units.at(load_pos) if u.type == utype and u.owner == transport.owner), None)
+        if cargo is None:
+            return self._reject('no_cargo')
+        self._load(cargo, transport)
+        return True
+
+    @journaled
+    def unload(self, transport):
+        """Put carried units down on the transport's hex.
+
+        Returns the units unloaded (units that cannot stand there stay aboard),
+        or None when the transport cannot unload at all.
+        """
+        if transport.type not in ['TransportShip', 'TransportPlane'] or transport.movement_left <= 0:
+            self._reject('transport')
+            return None
+        pos = transport.pos
+        own_city = pos in self.cities and self.city_owners[pos] == transport.owner
+        if transport.type == 'TransportShip' and not (own_city or any(self.terrain[n] == 'land' for n in get_neighbors(*pos, self.grid))):
+            self._reject('no_land')
+            return None
+        if transport.type == 'TransportPlane' and pos not in self.cities:
+            self._reject('no_city')
+            return None
+        loads = self.transport_loads.get(transport.id, [])
+        unloaded = []
+        for u in list(loads):
+            if is_hex_occupied(pos, u.owner, self.units, self.cities, self.city_owners, max_stack):
+                self._reject('stack_full')
+                break
+            if self.terrain[pos] in get_allowed(u.type) or (pos in self.cities and self.city_owners[pos] == u.owner):
+                loads.remove(u)
+                u.pos = pos
+                u.movement_left = movements[u.type]
+                u.sentry = False
+                self.units.append(u)
+                unloaded.append(u)
+                self.emit('unloaded', unit=u, transport=transport)
+        if unloaded:
+            transport.movement_left = max(0, transport.movement_left - 1)
+        return unloaded
+
+    @journaled
+    def sentry(self, unit):
+        """Put a ground or sea unit on sentry until an enemy comes adjacent."""
+        if unit.type in ['Fighter', 'TransportPlane', 'AirCarrier'] or unit.movement_left <= 0:
+            return self._reject('sentry')
+        unit.sentry = True
+        unit.movement_left = 0
+        self.emit('sentried', unit=unit)
+        return True
+
+    @journaled
+    def skip(self, unit):
+        """Give up the unit's remaining movement this turn."""
+        unit.movement_left = 0
+
+    @journaled
+    def wake(self, unit):
+        """Take a unit off sentry with full movement."""
+        unit.sentry = False
+        unit.movement_left = movements[unit.type]
+        self.emit('woken', unit=unit)
+
+    def wake_sentries(self):
+        """Wake the current player's sentries that have an enemy adjacent."""
+        for unit in self.units.owned_by(self.current_player):
+            if unit.sentry and self.zone.enemy_near(unit.pos, unit.owner):
+                self.wake(unit)
+
+    @journaled
+    def set_production(self, city, utype):
+        """Start building utype in an own city; sea units need a coastal city."""
+        if self.city_owners.get(city) != self.current_player or utype not in unit_types or (utype in sea_units and city not in self.coastal_cities):
+            return self._reject('production')
+        self.productions[city]['unit'] = utype
+        self.productions[city]['turns_left'] = costs[utype]
+        self.emit('production_set', city=city, unit_type=utype)
+        return True
+
+    @journaled
+    def end_turn(self):
+        """Pass play to the next player and carry out their goto orders.
+
+        When play returns to the first player the round ends: air units burn
+        fuel, idle units heal, cities produce and the turn counter advances.
+        """
+        self.current_player = players[(players.index(self.current_player) + 1) % len(players)]
+        own_units = self.units.owned_by(self.current_player)
+        for unit in own_units:
+            unit.movement_left = movements[unit.type]
+        self.wake_sentries()
+        for unit in [u for u in own_units if u.path and not u.sentry]:
+            if unit in self.units:
+                self.move_along_path(unit)
+            if self.winner:
+                return
+        if self.current_player == players[0]:
+            self._end_round()
+            self._produce()
+            self.turn += 1
+            self.check_win()
+        self.emit('turn_started', player=self.current_player, turn=self.turn)
+
+    def _end_round(self):
+        """One sweep over the units on the map: refuel air units in own cities
+        (the rest burn one unit and crash when empty), then heal units that
+        stayed put, twice as fast in an own city."""
+        cities, city_owners = self.cities, self.city_owners
+        for unit in list(self.units):
+            if unit.fuel is not None and unit.type in max_fuel:
+                if unit.pos in cities and city_owners[unit.pos] == unit.owner:
+                    unit.fuel = max_fuel[unit.type]
+                else:
+                    unit.fuel -= 1
+                    if unit.fuel <= 0:
+                        self._destroy(unit, 'fuel')
+                        continue
+            if unit.did_move:
+                unit.did_move = False
+            elif unit.hp < unit.max_hp:
+                rate = 0.2 if unit.pos in cities and city_owners[unit.pos] == unit.owner else 0.1
+                unit.hp = min(unit.max_hp, unit.hp + max(1, int(rate * unit.max_hp)))
+
+    def _produce(self):
+        for c in self.cities:
+            if self.city_owners[c] is None:
+                continue
+            p = self.productions[c]
+            if p['turns_left'] > 0:
+                p['turns_left'] -= 1
+                if p['turns_left'] == 0:
+                    utype = p['unit']
+                    new_unit = self.units.create(utype, self.city_owners[c], c, 0, max_fuel.get(utype, None))
+                    if new_unit.type in capacity:
+                        self.transport_loads[new_unit.id] = []
+                    p['unit'] = None
+                    p['turns_left'] = 0
+                    self.emit('produced', unit=new_unit, city=c)
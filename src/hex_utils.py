@@ -1,28 +1,65 @@
 import math
+import numpy as np
 from settings import HEX_SIZE
 
+SQRT3 = math.sqrt(3)
+DIRECTIONS = [(1, 0), (1, -1), (0, -1), (-1, 0), (-1, 1), (0, 1)]
+
 def axial_to_pixel(q, r, zoom, cam_x, cam_y, screen_width, screen_height):
+    # The hex's world position and the camera offset snap to whole pixels
+    # separately, so hexes keep fixed pixel offsets from each other however the
+    # camera moves; TerrainLayer's cached tiles rely on it
+    base_x = HEX_SIZE * (3 / 2 * q) * zoom
+    base_y = HEX_SIZE * (SQRT3 * (r + q / 2)) * zoom
+    x = math.floor(base_x) + math.floor(cam_x + screen_width / 2)
+    y = math.floor(base_y) + math.floor(cam_y + screen_height / 2)
+    return x, y
+
+def axial_to_pixel_array(q, r, zoom, cam_x, cam_y, screen_width, screen_height):
+    """axial_to_pixel over arrays of q and r, with the same rounding to int."""
     base_x = HEX_SIZE * (3 / 2 * q) * zoom
-    base_y = HEX_SIZE * (math.sqrt(3) * (r + q / 2)) * zoom
-    x = base_x + cam_x + screen_width / 2
-    y = base_y + cam_y + screen_height / 2
-    return int(x), int(y)
+    base_y = HEX_SIZE * (SQRT3 * (r + q / 2)) * zoom
+    x = np.floor(base_x).astype(np.int64) + math.floor(cam_x + screen_width / 2)
+    y = np.floor(base_y).astype(np.int64) + math.floor(cam_y + screen_height / 2)
+    return x, y
+
+def axial_round(fq, fr):
+    """Round fractional axial coordinates to the containing hex via cube rounding."""
+    fs = -fq - fr
+    q = round(fq)
+    r = round(fr)
+    s = round(fs)
+    dq = abs(q - fq)
+    dr = abs(r - fr)
+    ds = abs(s - fs)
+    if dq > dr and dq > ds:
+        q = -r - s
+    elif dr > ds:
+        r = -q - s
+    return int(q), int(r)
 
 def pixel_to_axial(mx, my, zoom, cam_x, cam_y, screen_width, screen_height, grid):
+    """Return the hex under a screen position, or None when off-map.
+
+    `grid` only needs fast membership tests (a HexGrid or a set of
+    coordinates), so the lookup is constant time regardless of map size.
+    """
     world_x = (mx - screen_width / 2 - cam_x) / zoom
     world_y = (my - screen_height / 2 - cam_y) / zoom
+    q, r = axial_round((2 / 3 * world_x) / HEX_SIZE, (-1 / 3 * world_x + SQRT3 / 3 * world_y) / HEX_SIZE)
+    if (q, r) in grid:
+        return (q, r)
+    # Off-map cell: a bordering on-map hex still counts if its centre is within HEX_SIZE
     closest = None
-    min_dist = float('inf')
-    for q, r in grid:
-        cx = HEX_SIZE * (3 / 2 * q)
-        cy = HEX_SIZE * (math.sqrt(3) * (r + q / 2))
-        dist = math.hypot(cx - world_x, cy - world_y)
-        if dist < min_dist:
-            min_dist = dist
-            closest = (q, r)
-    if min_dist < HEX_SIZE:
-        return closest
-    return None
+    min_dist = HEX_SIZE
+    for dq, dr in DIRECTIONS:
+        nq, nr = q + dq, r + dr
+        if (nq, nr) in grid:
+            dist = math.hypot(HEX_SIZE * (3 / 2 * nq) - world_x, HEX_SIZE * (SQRT3 * (nr + nq / 2)) - world_y)
+            if dist < min_dist:
+                min_dist = dist
+                closest = (nq, nr)
+    return closest
 
 def hex_distance(a, b):
     qa, ra = a
@@ -31,6 +68,67 @@ def hex_distance(a, b):
     sb = -qb - rb
     return (abs(qa - qb) + abs(ra - rb) + abs(sa - sb)) // 2
 
+def hexes_in_range(center, radius):
+    """Return all hexes within `radius` steps of center (including off-map ones)."""
+    cq, cr = center
+    return [(cq + dq, cr + dr) for dq in range(-radius, radius + 1)
+            for dr in range(max(-radius, -dq - radius), min(radius, -dq + radius) + 1)]
+
+class HexGrid:
+    """The set of map hexes with a dense index and a precomputed adjacency table.
+
+    Iteration yields coordinates in generation order, membership is a hash
+    lookup, `q`/`r` hold the axial coordinates as int32 arrays and
+    `neighbor_table[i]` holds the dense indices of the six neighbours of hex
+    `i` in DIRECTIONS order (-1 where off-map).
+    """
+
+    def __init__(self, coords):
+        self.coords = list(coords)
+        qr = np.array(self.coords, dtype=np.int32).reshape(len(self.coords), 2)
+        self._build(qr[:, 0], qr[:, 1])
+
+    @classmethod
+    def from_axial(cls, q, r):
+        """Build a grid from parallel arrays of axial coordinates."""
+        grid = cls.__new__(cls)
+        grid.coords = list(zip(q.tolist(), r.tolist()))
+        grid._build(np.asarray(q, dtype=np.int32), np.asarray(r, dtype=np.int32))
+        return grid
+
+    def _build(self, q, r):
+        n = len(self.coords)
+        self.q = q
+        self.r = r
+        self.index = dict(zip(self.coords, range(n)))
+        # Dense lookup over the bounding box, padded so every neighbour offset stays in range
+        q0 = int(q.min()) - 1
+        r0 = int(r.min()) - 1
+        lookup = np.full((int(q.max()) - q0 + 2, int(r.max()) - r0 + 2), -1, dtype=np.int32)
+        lookup[q - q0, r - r0] = np.arange(n, dtype=np.int32)
+        self.neighbor_table = np.stack([lookup[q - q0 + dq, r - r0 + dr] for dq, dr in DIRECTIONS], axis=1)
+        # Neighbour coordinate tuples are built on first use of each hex
+        self._neighbors = [None] * n
+
+    def __len__(self):
+        return len(self.coords)
+
+    def __iter__(self):
+        return iter(self.coords)
+
+    def __contains__(self, pos):
+        return pos in self.index
+
+    def neighbors(self, q, r):
+        """Return the on-map neighbours of (q, r) in DIRECTIONS order."""
+        i = self.index.get((q, r))
+        if i is None:
+            return [(q + dq, r + dr) for dq, dr in DIRECTIONS if (q + dq, r + dr) in self.index]
+        found = self._neighbors[i]
+        if found is None:
+            coords = self.coords
+            found = self._neighbors[i] = tuple(coords[j] for j in self.neighbor_table[i].tolist() if j >= 0)
+        return found
+
 def get_neighbors(q, r, grid):
-    directions = [(1, 0), (1, -1), (0, -1), (-1, 0), (-1, 1), (0, 1)]
-    return [(q + dq, r + dr) for dq, dr in directions if (q + dq, r + dr) in grid]
+    return grid.neighbors(q, r)
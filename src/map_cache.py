@@ -0,0 +1,72 @@
+import hashlib
+import json
+import os
+import zipfile
+import numpy as np
+from hex_utils import HexGrid
+from terrain_generator import generate_terrain_codes, terrain_from_codes
+from players import generate_cities_and_coastal, select_start_cities
+
+# Bump when the generators or the file layout change so stale maps are regenerated
+CACHE_VERSION = 1
+
+def stage_seeds(seed):
+    """Derive independent terrain, city and start-placement seeds from one map seed."""
+    return [int(s) for s in np.random.SeedSequence(seed).generate_state(3)]
+
+def generate_map(seed, num_players, circular_radius=40, res=8, octaves=4, persistence=0.5, num_cities=30, city_spacing=10):
+    """Generate (grid, terrain codes, cities, coastal cities, start cities) for `seed`."""
+    terrain_seed, city_seed, start_seed = stage_seeds(seed)
+    grid, codes = generate_terrain_codes(circular_radius, res, octaves, persistence, seed=terrain_seed)
+    cities, coastal_cities = generate_cities_and_coastal(grid, codes, city_seed, num_cities, city_spacing)
+    start_cities = select_start_cities(coastal_cities, num_players, start_seed)
+    return grid, codes, cities, coastal_cities, start_cities
+
+def cache_path(cache_dir, seed, num_players, params):
+    key = json.dumps({'version': CACHE_VERSION, 'players': num_players, 'params': params}, sort_keys=True)
+    digest = hashlib.sha1(key.encode()).hexdigest()[:12]
+    return os.path.join(cache_dir, f'map_{seed}_{digest}.npz')
+
+def save_map(path, grid, codes, cities, coastal_cities, start_cities):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f'{path}.{os.getpid()}.tmp'
+    with open(tmp, 'wb') as f:
+        np.savez_compressed(
+            f, q=grid.q, r=grid.r, terrain=codes,
+            cities=np.array(cities, dtype=np.int32).reshape(-1, 2),
+            coastal=np.array(sorted(coastal_cities), dtype=np.int32).reshape(-1, 2),
+            starts=np.array(start_cities, dtype=np.int32).reshape(-1, 2))
+    # Atomic so a concurrent or interrupted launch never sees a partial file
+    os.replace(tmp, path)
+
+def load_map(path):
+    with np.load(path) as data:
+        grid = HexGrid.from_axial(data['q'], data['r'])
+        codes = data['terrain']
+        cities = [tuple(c) for c in data['cities'].tolist()]
+        coastal_cities = {tuple(c) for c in data['coastal'].tolist()}
+        start_cities = [tuple(c) for c in data['starts'].tolist()]
+    return grid, codes, cities, coastal_cities, start_cities
+
+def load_or_generate_map(seed, num_players, params, cache_dir=None):
+    """Return the map for `seed`, reading it from `cache_dir` when already generated.
+
+    Returns (grid, terrain dict, cities, coastal cities, start cities). Without
+    a `cache_dir` the map is always generated and nothing is written.
+    """
+    path = cache_path(cache_dir, seed, num_players, params) if cache_dir else None
+    generated = None
+    if path and os.path.exists(path):
+        try:
+            generated = load_map(path)
+        except (OSError, ValueError, KeyError, EOFError, zipfile.BadZipFile):
+            generated = None
+    if generated is None:
+        generated = generate_map(seed, num_players, **params)
+        if path:
+            try:
+                save_map(path, *generated)
+            except OSError:
+                pass
+    grid, codes, cities, coastal_cities, start_cities = generated
+    return grid, terrain_from_codes(grid, codes), cities, coastal_cities, start_cities
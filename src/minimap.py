@@ -0,0 +1,88 @@
+import numpy as np
+import pygame
+from settings import HEX_SIZE, GREY, WHITE, players, player_colors, terrain_types
+from board import NO_OWNER, PLAYER_CODES
+from hex_utils import SQRT3
+from rendering import terrain_color
+
+# Colour rows: one per terrain code, then neutral cities, then one per player
+# code; a city's row is PLAYER_ROW + its owner code, so NO_OWNER picks GREY
+PLAYER_ROW = len(terrain_types) - NO_OWNER
+COLORS = np.array([terrain_color(t, None, False) for t in terrain_types] + [GREY] + [player_colors[p] for p in players], dtype=np.uint8)
+
+# Longest side of the panel in pixels; small maps are magnified to fill it
+MINIMAP_SIZE = 200
+MINIMAP_MARGIN = 10
+
+class Minimap:
+    """Overview panel with one pixel per hex, kept in an offscreen surface.
+
+    Hex (q, r) sits at column q and row r + q // 2 (rows run down the map
+    like the screen's y axis), magnified by a whole `scale` on small maps. A
+    pixel shows the owner of the units on the hex, else the city owner or
+    terrain. The surface is built once from the Board's code arrays through
+    COLORS; `refresh(pos)` repaints a single hex after units move or a city
+    changes hands.
+    """
+
+    def __init__(self, board, units, screen_width, screen_height):
+        self.board = board
+        self.units = units
+        grid = self.grid = board.grid
+        rows = grid.r + grid.q // 2
+        self.q_min = int(grid.q.min())
+        self.row_min = int(rows.min())
+        width = int(grid.q.max()) - self.q_min + 1
+        height = int(rows.max()) - self.row_min + 1
+        self.scale = max(1, MINIMAP_SIZE // max(width, height))
+        codes = board.terrain.astype(np.intp)
+        codes[board.is_city] = PLAYER_ROW + board.city_owner[board.is_city]
+        for pos in {u.pos for u in units}:
+            codes[grid.index[pos]] = PLAYER_ROW + PLAYER_CODES[units.at(pos)[-1].owner]
+        pixels = np.zeros((width, height, 3), dtype=np.uint8)
+        pixels[grid.q - self.q_min, rows - self.row_min] = COLORS[codes]
+        self.surface = pygame.surfarray.make_surface(pixels)
+        if self.scale > 1:
+            self.surface = pygame.transform.scale(self.surface, (width * self.scale, height * self.scale))
+        self.rect = pygame.Rect(MINIMAP_MARGIN, screen_height - MINIMAP_MARGIN - height * self.scale, width * self.scale, height * self.scale)
+
+    def _color(self, pos):
+        stack = self.units.at(pos)
+        if stack:
+            return player_colors[stack[-1].owner]
+        i = self.grid.index[pos]
+        if self.board.is_city[i]:
+            return COLORS[PLAYER_ROW + self.board.city_owner[i]]
+        return COLORS[self.board.terrain[i]]
+
+    def refresh(self, pos):
+        """Repaint the pixel of one hex from the current board."""
+        if pos not in self.grid:
+            return
+        q, r = pos
+        x = (q - self.q_min) * self.scale
+        y = (r + q // 2 - self.row_min) * self.scale
+        self.surface.fill(self._color(pos), (x, y, self.scale, self.scale))
+
+    def _to_panel(self, world_x, world_y):
+        x = self.rect.x + (world_x / (HEX_SIZE * 1.5) - self.q_min + 0.5) * self.scale
+        y = self.rect.y + (world_y / (HEX_SIZE * SQRT3) - self.row_min + 0.5) * self.scale
+        return x, y
+
+    def camera_for(self, pos, zoom):
+        """Camera that centres the screen on the map point under panel position pos, or None outside the panel."""
+        if not self.rect.collidepoint(pos):
+            return None
+        world_x = ((pos[0] - self.rect.x) / self.scale + self.q_min - 0.5) * HEX_SIZE * 1.5
+        world_y = ((pos[1] - self.rect.y) / self.scale + self.row_min - 0.5) * HEX_SIZE * SQRT3
+        return -world_x * zoom, -world_y * zoom
+
+    def draw(self, screen, zoom, cam_x, cam_y, screen_width, screen_height):
+        """Blit the panel and outline the part of the map on screen."""
+        pygame.draw.rect(screen, GREY, self.rect.inflate(4, 4), 2)
+        screen.blit(self.surface, self.rect)
+        left, top = self._to_panel((-cam_x - screen_width / 2) / zoom, (-cam_y - screen_height / 2) / zoom)
+        right, bottom = self._to_panel((-cam_x + screen_width / 2) / zoom, (-cam_y + screen_height / 2) / zoom)
+        screen.set_clip(self.rect)
+        pygame.draw.rect(screen, WHITE, (int(left), int(top), max(1, int(right - left)), max(1, int(bottom - top))), 1)
+        screen.set_clip(None)
@@ -1,80 +1,89 @@
 import random
-from hex_utils import hex_distance, get_neighbors
-from units import get_allowed
+import numpy as np
+from board import Board, TERRAIN_CODES
+from hex_utils import hex_distance
+from units import UnitRegistry
 from settings import players, unit_stats, movements, city_max_hp, capacity
 
-def select_spaced_cities(hexes, min_dist, num):
+def select_spaced_cities(hexes, min_dist, num, rng=random):
+    """Poisson-disc (dart throwing) selection of up to `num` hexes at least `min_dist` apart.
+
+    Candidates are tried in random order and accepted when no selected hex is
+    closer than `min_dist`. Selected hexes are bucketed in a spatial hash of
+    min_dist-sized cells, so each test only looks at the 3x3 surrounding cells.
+    """
     selected = []
+    if num <= 0:
+        return selected
     candidates = hexes[:]
-    random.shuffle(candidates)
+    rng.shuffle(candidates)
+    cell = max(1, min_dist)
+    buckets = {}
     for cand in candidates:
         if len(selected) >= num:
             break
-        if all(hex_distance(cand, s) >= min_dist for s in selected):
+        q, r = cand
+        cq, cr = q // cell, r // cell
+        # hex_distance < min_dist implies |dq| < min_dist and |dr| < min_dist
+        if all(hex_distance(cand, s) >= min_dist
+               for bq in (cq - 1, cq, cq + 1) for br in (cr - 1, cr, cr + 1)
+               for s in buckets.get((bq, br), ())):
             selected.append(cand)
+            buckets.setdefault((cq, cr), []).append(cand)
     return selected
 
-def generate_cities_and_coastal(grid, terrain):
-    land_hexes = [h for h in grid if terrain[h] == 'land']
-    coastal_land = [h for h in land_hexes if any(terrain.get(n, '') == 'water' for n in get_neighbors(*h, grid))]
-    non_coastal = list(set(land_hexes) - set(coastal_land))
+def generate_cities_and_coastal(grid, terrain_codes, seed=None, num_cities=30, spacing=10):
+    """Place `num_cities` cities on land, each set at least `spacing` hexes apart.
+
+    `terrain_codes` is the int8 terrain array over the grid index. About half
+    the cities go on the coast; the same `seed` and map always give the same
+    cities. Returns the cities in random order and the set of coastal ones.
+    """
+    rng = random.Random(seed) if seed is not None else random
+    board = Board(grid, terrain_codes)
+    land = board.terrain == TERRAIN_CODES['land']
+    coastal = board.coastal_mask()
+    coords = grid.coords
+    coastal_land = [coords[i] for i in np.flatnonzero(coastal).tolist()]
+    non_coastal = [coords[i] for i in np.flatnonzero(land & ~coastal).tolist()]
 
-    num_cities = 30
     num_coastal = max(5, min(len(coastal_land), num_cities // 2 + num_cities % 2))
-    coastal_selected = select_spaced_cities(coastal_land, 10, num_coastal)
+    coastal_selected = select_spaced_cities(coastal_land, spacing, num_coastal, rng)
     remaining = num_cities - len(coastal_selected)
-    non_coastal_selected = select_spaced_cities(non_coastal, 10, remaining)
+    non_coastal_selected = select_spaced_cities(non_coastal, spacing, remaining, rng)
     cities = coastal_selected + non_coastal_selected
-    random.shuffle(cities)
-
-    coastal_cities = set()
-    for c in cities:
-        q, r = c
-        for nq, nr in get_neighbors(q, r, grid):
-            if terrain[(nq, nr)] == 'water':
-                coastal_cities.add(c)
-                break
+    rng.shuffle(cities)
 
+    coastal_cities = set(coastal_selected)
     return cities, coastal_cities
 
-def assign_starting_cities_and_units(cities, coastal_cities, players, grid, unit_stats, movements):
-    coastal_list = list(coastal_cities)
-    start_cities = []
-    start_cities.append(random.choice(coastal_list))
+def select_start_cities(coastal_cities, num_players, seed=None):
+    """Pick one coastal start city per player, preferably 5-10 hexes apart."""
+    rng = random.Random(seed) if seed is not None else random
+    coastal_list = sorted(coastal_cities)
+    start_cities = [rng.choice(coastal_list)]
     min_d = 5
     max_d = 10
-    candidates2 = [c for c in coastal_list if c != start_cities[0] and min_d <= hex_distance(c, start_cities[0]) <= max_d]
-    if not candidates2:
-        candidates2 = [c for c in coastal_list if c != start_cities[0]]
-    start_cities.append(random.choice(candidates2))
-    candidates3 = [c for c in coastal_list if c not in start_cities and all(min_d <= hex_distance(c, s) <= max_d for s in start_cities)]
-    if not candidates3:
-        candidates3 = [c for c in coastal_list if c not in start_cities]
-    start_cities.append(random.choice(candidates3))
+    while len(start_cities) < num_players:
+        candidates = [c for c in coastal_list if c not in start_cities and all(min_d <= hex_distance(c, s) <= max_d for s in start_cities)]
+        if not candidates:
+            candidates = [c for c in coastal_list if c not in start_cities]
+        start_cities.append(rng.choice(candidates))
+    return start_cities
+
+def assign_starting_cities_and_units(cities, coastal_cities, players, grid, unit_stats, movements, start_cities=None, seed=None):
+    if start_cities is None:
+        start_cities = select_start_cities(coastal_cities, len(players), seed)
 
     city_owners = {c: None for c in cities}
-    units = []
+    units = UnitRegistry()
     for i, player in enumerate(players):
         city = start_cities[i]
         city_owners[city] = player
         utype = 'Infantry'
-        stats = unit_stats[utype]
-        units.append({
-            'pos': city,
-            'type': utype,
-            'movement_left': movements[utype],
-            'owner': player,
-            'fuel': None,
-            'hp': stats['max_hp'],
-            'max_hp': stats['max_hp'],
-            'attack': stats['attack'],
-            'defense': stats['defense'],
-            'range': stats['range'],
-            'did_move': False,
-            'sentry': False
-        })
+        units.create(utype, player, city, movements[utype])
 
-    transport_loads = {id(u): [] for u in units if u['type'] in capacity}
+    transport_loads = {u.id: [] for u in units if u.type in capacity}
     productions = {c: {'unit': None, 'turns_left': 0} for c in cities}
     city_hp = {c: city_max_hp for c in cities}
 
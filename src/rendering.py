@@ -1,30 +1,46 @@
 import math
+import numpy as np
 import pygame
-from collections import Counter
+from collections import Counter, OrderedDict
 from settings import HEX_SIZE, BLUE, GREEN, BROWN, GREY, BLACK, player_colors, production_text_colors, YELLOW, RED, ORANGE, LIGHT_RED, DARK_RED, WHITE, light_colors, unit_digits, digit_colors, city_max_hp, costs, movements, max_fuel
-from hex_utils import axial_to_pixel
+from hex_utils import axial_to_pixel, axial_to_pixel_array, SQRT3
+from text_cache import get_font, render_text
+
+_corner_offsets = {}
+
+def hex_corners(zoom):
+    """Offsets of the six corners from a hex centre at this zoom, computed once per zoom."""
+    corners = _corner_offsets.get(zoom)
+    if corners is None:
+        effective_size = HEX_SIZE * zoom
+        corners = _corner_offsets[zoom] = [(round(effective_size * math.cos(math.radians(60 * i)), 9), round(effective_size * math.sin(math.radians(60 * i)), 9)) for i in range(6)]
+    return corners
 
 def draw_hex(screen, center_x, center_y, color, zoom):
-    effective_size = HEX_SIZE * zoom
-    points = []
-    for i in range(6):
-        angle = math.radians(60 * i)
-        px = center_x + effective_size * math.cos(angle)
-        py = center_y + effective_size * math.sin(angle)
-        points.append((px, py))
+    points = [(center_x + dx, center_y + dy) for dx, dy in hex_corners(zoom)]
     pygame.draw.polygon(screen, color, points)
     pygame.draw.polygon(screen, BLACK, points, 1)
 
 def draw_hex_border(screen, center_x, center_y, color, width, zoom):
-    effective_size = HEX_SIZE * zoom
-    points = []
-    for i in range(6):
-        angle = math.radians(60 * i)
-        px = center_x + effective_size * math.cos(angle)
-        py = center_y + effective_size * math.sin(angle)
-        points.append((px, py))
+    points = [(center_x + dx, center_y + dy) for dx, dy in hex_corners(zoom)]
     pygame.draw.polygon(screen, color, points, width)
 
+def visible_hex_positions(hexes, zoom, cam_x, cam_y, screen_width, screen_height):
+    """Screen centres of the hexes that are on screen, computed in one NumPy pass."""
+    if not hexes:
+        return []
+    qr = np.array(list(hexes), dtype=np.float64)
+    xs, ys = axial_to_pixel_array(qr[:, 0], qr[:, 1], zoom, cam_x, cam_y, screen_width, screen_height)
+    margin = HEX_SIZE * zoom
+    visible = (xs > -margin) & (xs < screen_width + margin) & (ys > -margin) & (ys < screen_height + margin)
+    return list(zip(xs[visible].tolist(), ys[visible].tolist()))
+
+def draw_hex_borders(screen, hexes, color, width, zoom, cam_x, cam_y, screen_width, screen_height):
+    """Outline every on-screen hex in `hexes`."""
+    corners = hex_corners(zoom)
+    for hx, hy in visible_hex_positions(hexes, zoom, cam_x, cam_y, screen_width, screen_height):
+        pygame.draw.polygon(screen, color, [(hx + dx, hy + dy) for dx, dy in corners], width)
+
 def draw_dashed_line(screen, color, start, end, width=7, dash=10, gap=5, offset=0):
     dx = end[0] - start[0]
     dy = end[1] - start[1]
@@ -46,112 +62,276 @@ def is_within_screen_bounds(x, y, zoom, screen_width, screen_height):
     """Check if coordinates are within screen bounds with zoom-adjusted buffer."""
     return -HEX_SIZE * zoom < x < screen_width + HEX_SIZE * zoom and -HEX_SIZE * zoom < y < screen_height + HEX_SIZE * zoom
 
-def draw_screen(screen, grid, terrain, cities, city_owners, productions, city_hp, fuel_range, reachable, attackable_hexes, units, transport_loads, selected_unit, zoom, cam_x, cam_y, screen_width, screen_height, path_preview, preview_path, target_hex, show_path, path_to_show, turn, current_player, menu_active, menu_city, unit_types, sea_units, coastal_cities, font, bold_font, menu_scroll, hovered_hex=None, last_info_hex=None, last_selected_unit=None, highlighted_hex=None):
+# Terrain tiles cover TILE_SIZE x TILE_SIZE world pixels (at zoom 1.0)
+TILE_SIZE = 256
+# Hexes are filed under every tile within this many world pixels of their centre;
+# the slack covers rounding of hex outlines to whole pixels at low zoom
+TILE_MARGIN = HEX_SIZE + 4
+# Upper bound on pixels held by cached tiles across all zoom levels (~64 MB)
+TILE_CACHE_PIXELS = 16 * 1024 * 1024
+
+def terrain_color(t, owner, is_city):
+    if is_city:
+        return player_colors[owner] if owner else GREY
+    return BLUE if t == 'water' else GREEN if t == 'land' else BROWN
+
+class TerrainLayer:
+    """Terrain and city hexes pre-rendered into world-space tiles, cached per zoom level.
+
+    Only city ownership changes what a tile shows, so `invalidate(pos)`
+    after a capture drops just the tiles that city touches. Tiles are
+    rendered on first use at each zoom and the least recently used ones are
+    evicted past TILE_CACHE_PIXELS.
+    """
+
+    def __init__(self, grid, terrain, cities, city_owners):
+        self.grid = grid
+        self.terrain = terrain
+        self.cities = set(cities)
+        self.city_owners = city_owners
+        # Same expressions as axial_to_pixel, so centres round to the same pixels
+        self.world_x = HEX_SIZE * (3 / 2 * grid.q)
+        self.world_y = HEX_SIZE * (SQRT3 * (grid.r + grid.q / 2))
+        # A hex belongs to every tile its bounding box overlaps (at most four)
+        tx0 = np.floor((self.world_x - TILE_MARGIN) / TILE_SIZE).astype(np.int64)
+        tx1 = np.floor((self.world_x + TILE_MARGIN) / TILE_SIZE).astype(np.int64)
+        ty0 = np.floor((self.world_y - TILE_MARGIN) / TILE_SIZE).astype(np.int64)
+        ty1 = np.floor((self.world_y + TILE_MARGIN) / TILE_SIZE).astype(np.int64)
+        index = np.arange(len(grid))
+        tx = np.concatenate([tx0, tx1, tx0, tx1])
+        ty = np.concatenate([ty0, ty0, ty1, ty1])
+        hexes = np.concatenate([index, index, index, index])
+        pairs = np.unique(np.stack([tx, ty, hexes], axis=1), axis=0)
+        keys, starts = np.unique(pairs[:, :2], axis=0, return_index=True)
+        self.tile_hexes = {tuple(k): v for k, v in zip(keys.tolist(), np.split(pairs[:, 2], starts[1:]))}
+        self.surfaces = OrderedDict()
+        self.cached_pixels = 0
+
+    def tiles_of(self, pos):
+        i = self.grid.index[pos]
+        x, y = self.world_x[i], self.world_y[i]
+        return {(math.floor((x + dx) / TILE_SIZE), math.floor((y + dy) / TILE_SIZE))
+                for dx in (-TILE_MARGIN, TILE_MARGIN) for dy in (-TILE_MARGIN, TILE_MARGIN)}
+
+    def invalidate(self, pos):
+        """Re-render the tiles showing the hex at pos (e.g. a city that changed hands)."""
+        tiles = self.tiles_of(pos)
+        for key in [k for k in self.surfaces if k[0] in tiles]:
+            surface = self.surfaces.pop(key)
+            self.cached_pixels -= surface.get_width() * surface.get_height()
+
+    def _render_tile(self, tile, zoom):
+        # Tile edges and hex centres snap to whole pixels, as axial_to_pixel does
+        left = math.floor(tile[0] * TILE_SIZE * zoom)
+        top = math.floor(tile[1] * TILE_SIZE * zoom)
+        width = math.floor((tile[0] + 1) * TILE_SIZE * zoom) - left
+        height = math.floor((tile[1] + 1) * TILE_SIZE * zoom) - top
+        # pygame rasterises polygons cut by the surface edge slightly differently,
+        # so draw on a padded surface that holds every hex whole and crop
+        pad = math.ceil(TILE_MARGIN * zoom) + 2
+        surface = pygame.Surface((width + 2 * pad, height + 2 * pad))
+        surface.fill(BLACK)
+        coords = self.grid.coords
+        hexes = self.tile_hexes[tile]
+        xs = (np.floor(self.world_x[hexes] * zoom) - (left - pad)).tolist()
+        ys = (np.floor(self.world_y[hexes] * zoom) - (top - pad)).tolist()
+        for i, x, y in zip(hexes.tolist(), xs, ys):
+            pos = coords[i]
+            color = terrain_color(self.terrain[pos], self.city_owners.get(pos), pos in self.cities)
+            draw_hex(surface, x, y, color, zoom)
+        return surface.subsurface((pad, pad, width, height)).copy()
+
+    def _tile_surface(self, tile, zoom):
+        key = (tile, round(zoom, 3))
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            return surface
+        surface = self._render_tile(tile, zoom)
+        self.surfaces[key] = surface
+        self.cached_pixels += surface.get_width() * surface.get_height()
+        while self.cached_pixels > TILE_CACHE_PIXELS and len(self.surfaces) > 1:
+            _, old = self.surfaces.popitem(last=False)
+            self.cached_pixels -= old.get_width() * old.get_height()
+        return surface
+
+    def draw(self, screen, zoom, cam_x, cam_y, screen_width, screen_height):
+        """Blit the tiles overlapping the screen."""
+        # Screen pixel = world pixel * zoom + cam + screen / 2
+        left = (-cam_x - screen_width / 2) / zoom
+        top = (-cam_y - screen_height / 2) / zoom
+        right = left + screen_width / zoom
+        bottom = top + screen_height / zoom
+        offset_x = math.floor(cam_x + screen_width / 2)
+        offset_y = math.floor(cam_y + screen_height / 2)
+        for tx in range(math.floor(left / TILE_SIZE), math.floor(right / TILE_SIZE) + 1):
+            for ty in range(math.floor(top / TILE_SIZE), math.floor(bottom / TILE_SIZE) + 1):
+                if (tx, ty) in self.tile_hexes:
+                    sx = math.floor(tx * TILE_SIZE * zoom) + offset_x
+                    sy = math.floor(ty * TILE_SIZE * zoom) + offset_y
+                    screen.blit(self._tile_surface((tx, ty), zoom), (sx, sy))
+
+def draw_unit(screen, unit, ux, uy, zoom, font, selected=False):
+    owner = unit.owner
+    if selected:
+        ticks = pygame.time.get_ticks()
+        ball_color = player_colors[owner] if (ticks // 500) % 2 == 0 else light_colors[owner]
+    else:
+        ball_color = player_colors[owner]
+    pygame.draw.circle(screen, ball_color, (ux, uy), int(HEX_SIZE * zoom // 2))
+    digit = unit_digits[unit.type]
+    text = render_text(font, digit, digit_colors[owner])
+    screen.blit(text, (ux - text.get_width() // 2, uy - text.get_height() // 2))
+    # Draw HP bar
+    if unit.hp > 0:
+        percentage = (unit.hp / unit.max_hp) * 100
+        if percentage == 100:
+            hp_color = GREEN
+        elif 75 <= percentage < 100:
+            hp_color = YELLOW
+        elif 50 <= percentage < 75:
+            hp_color = ORANGE
+        elif 25 <= percentage < 50:
+            hp_color = LIGHT_RED
+        else:
+            hp_color = DARK_RED
+        bar_width = int(HEX_SIZE * zoom // 2)
+        bar_height = 4
+        fill_width = int(bar_width * (unit.hp / unit.max_hp))
+        hp_bar_bg = pygame.Rect(ux - bar_width // 2, uy + int(HEX_SIZE * zoom // 3), bar_width, bar_height)
+        hp_bar_fill = pygame.Rect(ux - bar_width // 2, uy + int(HEX_SIZE * zoom // 3), fill_width, bar_height)
+        pygame.draw.rect(screen, GREY, hp_bar_bg)
+        pygame.draw.rect(screen, hp_color, hp_bar_fill)
+    # Draw sentry indicator
+    if unit.sentry:
+        pygame.draw.circle(screen, WHITE, (ux + int(HEX_SIZE * zoom // 3), uy - int(HEX_SIZE * zoom // 3)), 5)
+
+
+_visible = {'key': None}
+
+def visible_hexes(grid, cities, zoom, cam_x, cam_y, screen_width, screen_height):
+    """On-screen hexes as (pos, x, y) in grid order, and the cities among them.
+
+    Only the axial q/r window under the screen is probed, so the cost
+    follows what is on screen rather than the size of the map. The result is
+    reused until the camera, zoom or map changes.
+    """
+    key = (id(grid), zoom, cam_x, cam_y, screen_width, screen_height)
+    if _visible['key'] == key:
+        return _visible['hexes'], _visible['cities']
+    margin = HEX_SIZE * zoom
+    origin_x = cam_x + screen_width / 2
+    origin_y = cam_y + screen_height / 2
+    column = HEX_SIZE * 1.5 * zoom
+    row = HEX_SIZE * SQRT3 * zoom
+    index = grid.index
+    found = []
+    for q in range(math.floor((-margin - origin_x) / column), math.ceil((screen_width + margin - origin_x) / column) + 1):
+        r_min = math.floor((-margin - origin_y) / row - q / 2)
+        r_max = math.ceil((screen_height + margin - origin_y) / row - q / 2)
+        found.extend(i for i in map(index.get, [(q, r) for r in range(r_min, r_max + 1)]) if i is not None)
+    found.sort()
+    hexes = [grid.coords[i] for i in found]
+    qr = np.array(hexes, dtype=np.float64).reshape(-1, 2)
+    xs, ys = axial_to_pixel_array(qr[:, 0], qr[:, 1], zoom, cam_x, cam_y, screen_width, screen_height)
+    on_screen = (xs > -margin) & (xs < screen_width + margin) & (ys > -margin) & (ys < screen_height + margin)
+    visible = [(hexes[i], x, y) for i, x, y in zip(np.flatnonzero(on_screen).tolist(), xs[on_screen].tolist(), ys[on_screen].tolist())]
+    _visible.update(key=key, hexes=visible, cities=[v for v in visible if v[0] in cities])
+    return _visible['hexes'], _visible['cities']
+
+def draw_battle_odds(screen, odds, x, y, font, screen_width, screen_height):
+    """Draw a win/loss tooltip for a hovered attack target next to (x, y)."""
+    lines = [f"Win {odds['win']:.0%}  Lose {odds['loss']:.0%}"]
+    if odds['stalled'] > 0:
+        lines[0] += f"  Stall {odds['stalled']:.0%}"
+    lines.append(f"HP left: {odds['mean_attacker_hp']:.1f} vs {odds['mean_defender_hp']:.1f}")
+    texts = [render_text(font, line, WHITE) for line in lines]
+    width = max(t.get_width() for t in texts) + 12
+    height = sum(t.get_height() for t in texts) + 8
+    box_x = min(max(x + 20, 0), screen_width - width)
+    box_y = min(max(y - height - 20, 0), screen_height - height)
+    pygame.draw.rect(screen, BLACK, (box_x, box_y, width, height), border_radius=5)
+    pygame.draw.rect(screen, RED, (box_x, box_y, width, height), 2, border_radius=5)
+    ty = box_y + 4
+    for text in texts:
+        screen.blit(text, (box_x + 6, ty))
+        ty += text.get_height()
+
+def draw_screen(screen, grid, terrain, cities, city_owners, productions, city_hp, fuel_range, reachable, attackable_hexes, units, transport_loads, selected_unit, zoom, cam_x, cam_y, screen_width, screen_height, path_preview, preview_path, target_hex, show_path, path_to_show, turn, current_player, menu_active, menu_city, unit_types, sea_units, coastal_cities, font, bold_font, menu_scroll, hovered_hex=None, last_info_hex=None, last_selected_unit=None, highlighted_hex=None, battle_odds=None, unit_positions=None, terrain_layer=None):
     screen.fill(BLACK)
     
-    # Draw grid
-    for q, r in grid:
-        x, y = axial_to_pixel(q, r, zoom, cam_x, cam_y, screen_width, screen_height)
-        if is_within_screen_bounds(x, y, zoom, screen_width, screen_height):
-            t = terrain[(q, r)]
-            color = BLUE if t == 'water' else GREEN if t == 'land' else BROWN
-            if (q, r) in cities:
-                owner = city_owners[(q, r)]
-                color = player_colors[owner] if owner else GREY
-            draw_hex(screen, x, y, color, zoom)
-            if (q, r) in cities and city_owners[(q, r)] == current_player:
-                p = productions[(q, r)]
-                text_color = production_text_colors[current_player]
-                if p['turns_left'] > 0:
-                    digit = unit_digits[p['unit']]
-                    text = bold_font.render(digit, True, text_color)
-                else:
-                    text = bold_font.render('#', True, text_color)
-                screen.blit(text, (x - text.get_width() // 2, y - text.get_height() // 2))
-            # Draw city HP bar if below 100%
-            if (q, r) in cities and city_hp[(q, r)] < city_max_hp:
-                percentage = (city_hp[(q, r)] / city_max_hp) * 100
-                if percentage == 100:
-                    hp_color = GREEN
-                elif 75 <= percentage < 100:
-                    hp_color = YELLOW
-                elif 50 <= percentage < 75:
-                    hp_color = ORANGE
-                elif 25 <= percentage < 50:
-                    hp_color = LIGHT_RED
-                else:
-                    hp_color = DARK_RED
-                bar_width = int(HEX_SIZE * zoom // 2)
-                bar_height = 4
-                fill_width = int(bar_width * (city_hp[(q, r)] / city_max_hp))
-                hp_bar_bg = pygame.Rect(x - bar_width // 2, y + int(HEX_SIZE * zoom // 3), bar_width, bar_height)
-                hp_bar_fill = pygame.Rect(x - bar_width // 2, y + int(HEX_SIZE * zoom // 3), fill_width, bar_height)
-                pygame.draw.rect(screen, GREY, hp_bar_bg)
-                pygame.draw.rect(screen, hp_color, hp_bar_fill)
+    # Terrain and cities come from the cached tiles when there is a layer, else
+    # each visible hex is drawn; production and HP bars are drawn over them
+    visible, visible_cities = visible_hexes(grid, cities, zoom, cam_x, cam_y, screen_width, screen_height)
+    if terrain_layer:
+        terrain_layer.draw(screen, zoom, cam_x, cam_y, screen_width, screen_height)
+    else:
+        city_set = {c for c, _, _ in visible_cities}
+        for pos, x, y in visible:
+            draw_hex(screen, x, y, terrain_color(terrain[pos], city_owners.get(pos), pos in city_set), zoom)
+    for c, x, y in visible_cities:
+        if city_owners[c] == current_player:
+            p = productions[c]
+            text_color = production_text_colors[current_player]
+            if p['turns_left'] > 0:
+                digit = unit_digits[p['unit']]
+                text = render_text(bold_font, digit, text_color)
+            else:
+                text = render_text(bold_font, '#', text_color)
+            screen.blit(text, (x - text.get_width() // 2, y - text.get_height() // 2))
+        # Draw city HP bar if below 100%
+        if city_hp[c] < city_max_hp:
+            percentage = (city_hp[c] / city_max_hp) * 100
+            if percentage == 100:
+                hp_color = GREEN
+            elif 75 <= percentage < 100:
+                hp_color = YELLOW
+            elif 50 <= percentage < 75:
+                hp_color = ORANGE
+            elif 25 <= percentage < 50:
+                hp_color = LIGHT_RED
+            else:
+                hp_color = DARK_RED
+            bar_width = int(HEX_SIZE * zoom // 2)
+            bar_height = 4
+            fill_width = int(bar_width * (city_hp[c] / city_max_hp))
+            hp_bar_bg = pygame.Rect(x - bar_width // 2, y + int(HEX_SIZE * zoom // 3), bar_width, bar_height)
+            hp_bar_fill = pygame.Rect(x - bar_width // 2, y + int(HEX_SIZE * zoom // 3), fill_width, bar_height)
+            pygame.draw.rect(screen, GREY, hp_bar_bg)
+            pygame.draw.rect(screen, hp_color, hp_bar_fill)
     
     # Draw fuel range border
-    for hex_pos in fuel_range:
-        hx, hy = axial_to_pixel(*hex_pos, zoom, cam_x, cam_y, screen_width, screen_height)
-        if is_within_screen_bounds(hx, hy, zoom, screen_width, screen_height):
-            draw_hex_border(screen, hx, hy, RED, 3, zoom)
+    draw_hex_borders(screen, fuel_range, RED, 3, zoom, cam_x, cam_y, screen_width, screen_height)
     
     # Draw highlights
-    for hex_pos in reachable:
-        hx, hy = axial_to_pixel(*hex_pos, zoom, cam_x, cam_y, screen_width, screen_height)
-        if is_within_screen_bounds(hx, hy, zoom, screen_width, screen_height):
-            draw_hex_border(screen, hx, hy, YELLOW, 3, zoom)
+    draw_hex_borders(screen, reachable, YELLOW, 3, zoom, cam_x, cam_y, screen_width, screen_height)
     
     # Draw attackable borders
-    for h in attackable_hexes:
-        hx, hy = axial_to_pixel(*h, zoom, cam_x, cam_y, screen_width, screen_height)
-        if is_within_screen_bounds(hx, hy, zoom, screen_width, screen_height):
-            draw_hex_border(screen, hx, hy, RED, 3, zoom)
+    draw_hex_borders(screen, attackable_hexes, RED, 3, zoom, cam_x, cam_y, screen_width, screen_height)
     
-    # Draw units
-    units_to_draw = [u for u in units if u is not selected_unit] + [selected_unit] if selected_unit else units
-    for unit in units_to_draw:
-        if unit is None:
-            continue
-        ux, uy = axial_to_pixel(*unit['pos'], zoom, cam_x, cam_y, screen_width, screen_height)
+    # Draw units, found through the per-hex index for the hexes on screen
+    animated = unit_positions or {}
+    for pos, ux, uy in visible:
+        for unit in units.at(pos):
+            if unit is not selected_unit and unit.id not in animated:
+                draw_unit(screen, unit, ux, uy, zoom, font)
+    # Units still being animated are drawn where the animation has them
+    for unit_id, pos in animated.items():
+        unit = units.get(unit_id)
+        if unit is not None and unit is not selected_unit:
+            ux, uy = axial_to_pixel(*pos, zoom, cam_x, cam_y, screen_width, screen_height)
+            if is_within_screen_bounds(ux, uy, zoom, screen_width, screen_height):
+                draw_unit(screen, unit, ux, uy, zoom, font)
+    if selected_unit:
+        pos = animated.get(selected_unit.id, selected_unit.pos)
+        ux, uy = axial_to_pixel(*pos, zoom, cam_x, cam_y, screen_width, screen_height)
         if is_within_screen_bounds(ux, uy, zoom, screen_width, screen_height):
-            owner = unit['owner']
-            if selected_unit is unit:
-                ticks = pygame.time.get_ticks()
-                ball_color = player_colors[owner] if (ticks // 500) % 2 == 0 else light_colors[owner]
-            else:
-                ball_color = player_colors[owner]
-            pygame.draw.circle(screen, ball_color, (ux, uy), int(HEX_SIZE * zoom // 2))
-            digit = unit_digits[unit['type']]
-            text = font.render(digit, True, digit_colors[owner])
-            screen.blit(text, (ux - text.get_width() // 2, uy - text.get_height() // 2))
-            # Draw HP bar
-            if unit['hp'] > 0:
-                percentage = (unit['hp'] / unit['max_hp']) * 100
-                if percentage == 100:
-                    hp_color = GREEN
-                elif 75 <= percentage < 100:
-                    hp_color = YELLOW
-                elif 50 <= percentage < 75:
-                    hp_color = ORANGE
-                elif 25 <= percentage < 50:
-                    hp_color = LIGHT_RED
-                else:
-                    hp_color = DARK_RED
-                bar_width = int(HEX_SIZE * zoom // 2)
-                bar_height = 4
-                fill_width = int(bar_width * (unit['hp'] / unit['max_hp']))
-                hp_bar_bg = pygame.Rect(ux - bar_width // 2, uy + int(HEX_SIZE * zoom // 3), bar_width, bar_height)
-                hp_bar_fill = pygame.Rect(ux - bar_width // 2, uy + int(HEX_SIZE * zoom // 3), fill_width, bar_height)
-                pygame.draw.rect(screen, GREY, hp_bar_bg)
-                pygame.draw.rect(screen, hp_color, hp_bar_fill)
-            # Draw sentry indicator
-            if unit.get('sentry', False):
-                pygame.draw.circle(screen, WHITE, (ux + int(HEX_SIZE * zoom // 3), uy - int(HEX_SIZE * zoom // 3)), 5)
+            draw_unit(screen, selected_unit, ux, uy, zoom, font, selected=True)
     
     # Draw current path if selected
-    if selected_unit and 'path' in selected_unit and selected_unit['path']:
-        path = selected_unit['path']
-        points = [axial_to_pixel(*selected_unit['pos'], zoom, cam_x, cam_y, screen_width, screen_height)]
+    if selected_unit and selected_unit.path:
+        path = selected_unit.path
+        points = [axial_to_pixel(*selected_unit.pos, zoom, cam_x, cam_y, screen_width, screen_height)]
         for h in path:
             points.append(axial_to_pixel(*h, zoom, cam_x, cam_y, screen_width, screen_height))
         offset = (pygame.time.get_ticks() / 1000.0 * 10) % (10 + 5)
@@ -160,7 +340,7 @@ def draw_screen(screen, grid, terrain, cities, city_owners, productions, city_hp
     
     # Draw preview path
     if path_preview and preview_path:
-        points = [axial_to_pixel(*selected_unit['pos'], zoom, cam_x, cam_y, screen_width, screen_height)]
+        points = [axial_to_pixel(*selected_unit.pos, zoom, cam_x, cam_y, screen_width, screen_height)]
         for h in preview_path:
             points.append(axial_to_pixel(*h, zoom, cam_x, cam_y, screen_width, screen_height))
         offset = (pygame.time.get_ticks() / 1000.0 * 10) % (10 + 5)
@@ -171,18 +351,18 @@ def draw_screen(screen, grid, terrain, cities, city_owners, productions, city_hp
             draw_hex_border(screen, hx, hy, WHITE, 5, zoom)
             # Calculate turns
             path_len = len(preview_path)
-            mov = movements[selected_unit['type']]
-            if selected_unit['type'] in ['Fighter', 'TransportPlane'] and selected_unit['fuel'] is not None and path_len > selected_unit['fuel']:
+            mov = movements[selected_unit.type]
+            if selected_unit.type in ['Fighter', 'TransportPlane'] and selected_unit.fuel is not None and path_len > selected_unit.fuel:
                 turns_text = 'X'
             else:
                 turns = math.ceil(path_len / mov)
                 turns_text = str(turns)
-            text = bold_font.render(turns_text, True, BLACK)
+            text = render_text(bold_font, turns_text, BLACK)
             screen.blit(text, (hx - text.get_width() // 2, hy - text.get_height() // 2))
     
     # Draw shown path
     if show_path and path_to_show:
-        points = [axial_to_pixel(*selected_unit['pos'], zoom, cam_x, cam_y, screen_width, screen_height)]
+        points = [axial_to_pixel(*selected_unit.pos, zoom, cam_x, cam_y, screen_width, screen_height)]
         for h in path_to_show:
             points.append(axial_to_pixel(*h, zoom, cam_x, cam_y, screen_width, screen_height))
         offset = (pygame.time.get_ticks() / 1000.0 * 10) % (10 + 5)
@@ -194,13 +374,13 @@ def draw_screen(screen, grid, terrain, cities, city_owners, productions, city_hp
             draw_hex_border(screen, hx, hy, WHITE, 5, zoom)
             # Calculate turns for remaining path
             path_len = len(path_to_show)
-            mov = movements[selected_unit['type']]
-            if selected_unit['type'] in ['Fighter', 'TransportPlane'] and selected_unit['fuel'] is not None and path_len > selected_unit['fuel']:
+            mov = movements[selected_unit.type]
+            if selected_unit.type in ['Fighter', 'TransportPlane'] and selected_unit.fuel is not None and path_len > selected_unit.fuel:
                 turns_text = 'X'
             else:
                 turns = math.ceil(path_len / mov)
                 turns_text = str(turns)
-            text = bold_font.render(turns_text, True, BLACK)
+            text = render_text(bold_font, turns_text, BLACK)
             screen.blit(text, (hx - text.get_width() // 2, hy - text.get_height() // 2))
     
     # Draw highlighted hex border
@@ -209,8 +389,13 @@ def draw_screen(screen, grid, terrain, cities, city_owners, productions, city_hp
         if is_within_screen_bounds(hx, hy, zoom, screen_width, screen_height):
             draw_hex_border(screen, hx, hy, WHITE, 2, zoom)
     
+    # Draw odds for the hovered attack target
+    if battle_odds and hovered_hex:
+        hx, hy = axial_to_pixel(*hovered_hex, zoom, cam_x, cam_y, screen_width, screen_height)
+        draw_battle_odds(screen, battle_odds, hx, hy, font, screen_width, screen_height)
+
     # Draw UI
-    turn_text = font.render(f"Turn: {turn} - Player: {current_player}", True, WHITE)
+    turn_text = render_text(font, f"Turn: {turn} - Player: {current_player}", WHITE)
     screen.blit(turn_text, (10, 10))
     
     if menu_active:
@@ -224,10 +409,10 @@ def draw_screen(screen, grid, terrain, cities, city_owners, productions, city_hp
         pygame.draw.rect(screen, WHITE, (menu_x, menu_y, menu_width, menu_height), border_radius=10)
         p = productions[menu_city]
         y_pos = menu_y + 10
-        menu_font = pygame.font.SysFont('Arial', 18, bold=True)
+        menu_font = get_font('Arial', 18, bold=True)
         if p['turns_left'] > 0:
             status = f"{p['unit']} ({p['turns_left']} turns)"
-            text = menu_font.render(status, True, BLACK)
+            text = render_text(menu_font, status, BLACK)
             screen.blit(text, (menu_x + 10, y_pos))
             y_pos += 40
         is_coastal = menu_city in coastal_cities
@@ -247,32 +432,32 @@ def draw_screen(screen, grid, terrain, cities, city_owners, productions, city_hp
             item_y = y_pos + i * item_height - menu_scroll
             if item_y + item_height < menu_y or item_y > menu_y + menu_height:
                 continue
-            text = menu_font.render(f"{ut} ({costs[ut]} turns)", True, BLACK)
+            text = render_text(menu_font, f"{ut} ({costs[ut]} turns)", BLACK)
             screen.blit(text, (menu_x + 10, item_y))
 
     # Draw information line
-    info_font = pygame.font.SysFont(None, 22)  # Reverted to original font size
+    info_font = get_font(None, 22)  # Reverted to original font size
     if last_info_hex or (selected_unit and last_info_hex is None):
         info_text = ""
         display_hex = last_info_hex
         if display_hex is None and selected_unit:
-            display_hex = selected_unit['pos']
+            display_hex = selected_unit.pos
         if display_hex:
-            unit = next((u for u in units if u['pos'] == display_hex), None)
+            unit = next(iter(units.at(display_hex)), None)
             if unit:
-                if unit['owner'] == current_player:
-                    type_ = unit['type']
-                    health = f"{unit['hp']}/{unit['max_hp']}"
-                    movement = f"{unit['movement_left']}/{movements[type_]}"
-                    fuel = f", Fuel: {unit['fuel']}/{max_fuel.get(type_, 'N/A')}" if unit.get('fuel') is not None else ""
+                if unit.owner == current_player:
+                    type_ = unit.type
+                    health = f"{unit.hp}/{unit.max_hp}"
+                    movement = f"{unit.movement_left}/{movements[type_]}"
+                    fuel = f", Fuel: {unit.fuel}/{max_fuel.get(type_, 'N/A')}" if unit.fuel is not None else ""
                     info_text = f"{type_}: Health: {health}, Movement: {movement}{fuel}"
                     # Add loaded units if transport
-                    if id(unit) in transport_loads and transport_loads[id(unit)]:
-                        loaded = Counter(lu['type'] for lu in transport_loads[id(unit)])
+                    if unit.id in transport_loads and transport_loads[unit.id]:
+                        loaded = Counter(lu.type for lu in transport_loads[unit.id])
                         loaded_str = ", Loaded: " + ", ".join(f"{count} {typ}" for typ, count in loaded.items())
                         info_text += loaded_str
                 else:
-                    info_text = f"Enemy {unit['type']}"
+                    info_text = f"Enemy {unit.type}"
             elif display_hex in cities:
                 if city_owners[display_hex] == current_player:
                     p = productions[display_hex]
@@ -283,10 +468,10 @@ def draw_screen(screen, grid, terrain, cities, city_owners, productions, city_hp
                 info_text = terrain.get(display_hex, "Unknown")
         
         # Truncate text if too long for 600 pixels
-        text_surface = info_font.render(info_text, True, WHITE)
+        text_surface = render_text(info_font, info_text, WHITE)
         if text_surface.get_width() > 590:
             info_text = info_text[:75] + "..."  # Truncate to approx 75 chars, adjust as needed
-            text_surface = info_font.render(info_text, True, WHITE)
+            text_surface = render_text(info_font, info_text, WHITE)
         
         # Draw info line (600x30 to accommodate single line)
         box_rect = pygame.Rect(screen_width - 610, screen_height - 40, 600, 30)
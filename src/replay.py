@@ -0,0 +1,20 @@
+"""Replay a journaled game headlessly, as fast as the rules run.
+
+python replay.py JOURNAL [--no-check]
+"""
+import argparse
+import time
+from journal import read_journal, replay, state_digest
+
+parser = argparse.ArgumentParser(description="Replay a G-Warz journal without rendering")
+parser.add_argument('journal', help="journal written by a game (see --journal in main.py)")
+parser.add_argument('--no-check', action='store_true', help="do not compare the state with the recording at each turn")
+args = parser.parse_args()
+
+actions = sum('action' in entry for entry in read_journal(args.journal)[1])
+start = time.perf_counter()
+game = replay(args.journal, check=not args.no_check)
+elapsed = time.perf_counter() - start
+print(f"{actions} actions, turn {game.turn}, {game.current_player} to move, {len(game.units)} units on the map")
+print(f"winner: {game.winner or 'none'}, final digest {state_digest(game):08x}")
+print(f"replayed in {elapsed:.2f} s")
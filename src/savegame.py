@@ -0,0 +1,193 @@
+import gc
+import os
+import random
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from settings import players, unit_types
+from hex_utils import HexGrid
+from board import TERRAIN_CODES, PLAYER_CODES, UNIT_TYPE_CODES, owner_codes
+from terrain_generator import terrain_from_codes
+from units import Unit
+from engine import Game
+
+# Bump when the file layout changes; older saves are refused rather than misread
+SAVE_VERSION = 1
+# Stands for None in the integer columns (fuel, production, carrier, path)
+NONE = -1
+
+def snapshot_game(game):
+    """Copy what pack_game needs from a game, cheaply enough for the UI thread.
+
+    The map (grid, terrain, cities) never changes during play and is shared;
+    units become tuples of their fields and the city tables are copied, so
+    the snapshot stays consistent however play continues. Units carried by
+    a transport follow the units on the map, each paired with its
+    transport's ID in `carriers`.
+    """
+    on_map = [(u.id, u.type, u.owner, u.pos, u.movement_left, u.fuel, u.hp, u.did_move, u.sentry, u.path if u.path is None else u.path[:]) for u in game.units]
+    carriers = [tid for tid, loads in game.transport_loads.items() for _ in loads]
+    carried = [(u.id, u.type, u.owner, u.pos, u.movement_left, u.fuel, u.hp, u.did_move, u.sentry, u.path if u.path is None else u.path[:]) for loads in game.transport_loads.values() for u in loads]
+    productions = game.productions
+    return {
+        'header': (SAVE_VERSION, game.seed, game.turn, PLAYER_CODES[game.current_player], game.units.next_id),
+        'grid': game.grid,
+        'terrain': game.terrain,
+        'cities': game.cities,
+        'coastal_cities': game.coastal_cities,
+        'start_cities': game.start_cities,
+        'city_owners': [game.city_owners[c] for c in game.cities],
+        'city_hp': [game.city_hp[c] for c in game.cities],
+        'productions': [(productions[c]['unit'], productions[c]['turns_left']) for c in game.cities],
+        'attacked_cities': list(game.attacked_cities),
+        'transports': list(game.transport_loads),
+        'units': on_map + carried,
+        'carriers': carriers,
+    }
+
+def pack_snapshot(snapshot):
+    """Pack a snapshot_game as a dict of NumPy arrays, the members of a save file.
+
+    Hexes are stored by grid index and cities by their position in
+    game.cities. Carried units name their transport's ID in `unit_carrier`,
+    so loads are rebuilt by ID rather than by object. Goto paths are
+    concatenated in `path_hexes`, with `unit_path_len` giving each unit's
+    length (NONE for no order).
+    """
+    grid = snapshot['grid']
+    index = grid.index
+    cities = snapshot['cities']
+    city_row = {c: i for i, c in enumerate(cities)}
+    terrain = snapshot['terrain']
+    units = snapshot['units']
+    count = len(units)
+    ids, types, owners, positions, movement, fuel, hp, did_move, sentry, paths = zip(*units) if units else [()] * 10
+    carrier = np.full(count, NONE, dtype=np.int32)
+    carrier[count - len(snapshot['carriers']):] = snapshot['carriers']
+    production_units, production_turns = zip(*snapshot['productions']) if cities else ((), ())
+    return {
+        'header': np.array(snapshot['header'], dtype=np.int64),
+        'q': grid.q,
+        'r': grid.r,
+        'terrain': np.fromiter((TERRAIN_CODES[terrain[c]] for c in grid.coords), dtype=np.int8, count=len(grid)),
+        'city_index': np.fromiter((index[c] for c in cities), dtype=np.int32, count=len(cities)),
+        'city_coastal': np.fromiter((c in snapshot['coastal_cities'] for c in cities), dtype=bool, count=len(cities)),
+        'city_owner': owner_codes(snapshot['city_owners']),
+        'city_hp': np.array(snapshot['city_hp'], dtype=np.int16),
+        'production_unit': np.fromiter((UNIT_TYPE_CODES.get(u, NONE) for u in production_units), dtype=np.int8, count=len(cities)),
+        'production_turns': np.array(production_turns, dtype=np.int16),
+        'start_cities': np.array([city_row[c] for c in snapshot['start_cities']], dtype=np.int32),
+        'attacked_cities': np.array(sorted(city_row[c] for c in snapshot['attacked_cities']), dtype=np.int32),
+        'transports': np.array(snapshot['transports'], dtype=np.int32),
+        'unit_id': np.array(ids, dtype=np.int32),
+        'unit_type': np.fromiter((UNIT_TYPE_CODES[t] for t in types), dtype=np.int8, count=count),
+        'unit_owner': np.fromiter((PLAYER_CODES[o] for o in owners), dtype=np.int8, count=count),
+        'unit_pos': np.fromiter((index[p] for p in positions), dtype=np.int32, count=count),
+        'unit_movement': np.array(movement, dtype=np.int16),
+        'unit_fuel': np.fromiter((NONE if f is None else f for f in fuel), dtype=np.int16, count=count),
+        'unit_hp': np.array(hp, dtype=np.int16),
+        'unit_did_move': np.array(did_move, dtype=bool),
+        'unit_sentry': np.array(sentry, dtype=bool),
+        'unit_carrier': carrier,
+        'unit_path_len': np.fromiter((NONE if p is None else len(p) for p in paths), dtype=np.int32, count=count),
+        'path_hexes': np.array([index[h] for p in paths if p for h in p], dtype=np.int32),
+    }
+
+def pack_game(game):
+    """Snapshot a game as a dict of NumPy arrays, the members of a save file."""
+    return pack_snapshot(snapshot_game(game))
+
+def write_save(path, arrays):
+    """Write packed arrays to path, replacing any previous save atomically."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp = f'{path}.{os.getpid()}.tmp'
+    with open(tmp, 'wb') as f:
+        np.savez(f, **arrays)
+    os.replace(tmp, path)
+
+def save_game(path, game):
+    write_save(path, pack_game(game))
+
+def unpack_game(arrays, cls=Game, rng=random):
+    """Rebuild a game of class cls from the arrays of pack_game."""
+    # Rebuilding allocates a few hundred thousand tuples, dicts and units that
+    # all stay alive, so collector passes during it would find nothing to free
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return _unpack(arrays, cls, rng)
+    finally:
+        if enabled:
+            gc.enable()
+
+def _unpack(arrays, cls, rng):
+    version, seed, turn, current, next_id = arrays['header'].tolist()
+    if version != SAVE_VERSION:
+        raise ValueError(f"save version {version} is not supported (expected {SAVE_VERSION})")
+    grid = HexGrid.from_axial(arrays['q'], arrays['r'])
+    coords = grid.coords
+    cities = [coords[i] for i in arrays['city_index'].tolist()]
+    coastal_cities = {c for c, coastal in zip(cities, arrays['city_coastal'].tolist()) if coastal}
+    city_owners = {c: players[o] if o >= 0 else None for c, o in zip(cities, arrays['city_owner'].tolist())}
+    city_hp = dict(zip(cities, arrays['city_hp'].tolist()))
+    productions = {c: {'unit': unit_types[u] if u >= 0 else None, 'turns_left': t}
+                   for c, u, t in zip(cities, arrays['production_unit'].tolist(), arrays['production_turns'].tolist())}
+    start_cities = [cities[i] for i in arrays['start_cities'].tolist()]
+    attacked_cities = [cities[i] for i in arrays['attacked_cities'].tolist()]
+
+    on_map = []
+    transport_loads = {tid: [] for tid in arrays['transports'].tolist()}
+    path_hexes = arrays['path_hexes'].tolist()
+    offset = 0
+    columns = [arrays[k].tolist() for k in ('unit_id', 'unit_type', 'unit_owner', 'unit_pos', 'unit_movement', 'unit_fuel', 'unit_hp', 'unit_did_move', 'unit_sentry', 'unit_carrier', 'unit_path_len')]
+    for uid, utype, owner, pos, movement_left, fuel, hp, did_move, sentry, carrier, path_len in zip(*columns):
+        unit = Unit(uid, unit_types[utype], players[owner], coords[pos], movement_left, None if fuel == NONE else fuel)
+        unit.hp = hp
+        unit.did_move = did_move
+        unit.sentry = sentry
+        if path_len != NONE:
+            unit.path = [coords[i] for i in path_hexes[offset:offset + path_len]]
+            offset += path_len
+        if carrier == NONE:
+            on_map.append(unit)
+        else:
+            transport_loads[carrier].append(unit)
+
+    terrain = terrain_from_codes(grid, arrays['terrain'])
+    game = cls.from_state(seed, grid, terrain, cities, coastal_cities, start_cities, city_owners, on_map, transport_loads, productions, city_hp, turn, players[current], attacked_cities, rng, next_id)
+    game.check_win()
+    return game
+
+def load_game(path, cls=Game, rng=random):
+    """Load a game saved by save_game as an instance of cls (a Game subclass)."""
+    with np.load(path, allow_pickle=False) as data:
+        arrays = {name: data[name] for name in data.files}
+    return unpack_game(arrays, cls, rng)
+
+class Autosaver:
+    """Saves to one path on a background thread so ending a turn does not wait.
+
+    Only snapshot_game runs on the calling thread; packing and writing run
+    on the worker, and the snapshot keeps each file consistent however play
+    continues meanwhile. Saves run one at a time in order; like the map
+    cache, a failed write leaves the previous save in place and is otherwise
+    ignored.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.executor = ThreadPoolExecutor(1)
+
+    def save(self, game):
+        self.executor.submit(self._write, snapshot_game(game))
+
+    def _write(self, snapshot):
+        try:
+            write_save(self.path, pack_snapshot(snapshot))
+        except OSError:
+            pass
+
+    def close(self):
+        """Wait for pending saves to finish."""
+        self.executor.shutdown(wait=True)
@@ -1,3 +1,4 @@
+import os
 import numpy as np
 
 # Screen settings
@@ -62,9 +63,34 @@ city_range = 1
 min_city_hp = max(1, int(0.1 * city_max_hp))
 max_stack = 5
 
+# Battle: each strike deals int(attack * luck * 1.5 - defense * luck * terrain bonus * 0.5),
+# with independent luck rolls in battle_luck; a zero-damage strike still deals
+# chip_damage with probability chip_chance
+battle_luck = (0.8, 1.2)
+attack_factor = 1.5
+defense_factor = 0.5
+chip_damage = 2
+chip_chance = 0.2
+
+# Animation durations (ms)
+move_step_ms = 100
+strike_ms = 250
+win_banner_ms = 3000
+
+# Terrain types, in the order of their int8 codes on the array board
+terrain_types = ['water', 'land', 'mountain']
+
 # Terrain bonuses (e.g., defense multiplier)
 terrain_bonuses = {
     'mountain': {'defense': 1.2},
     'land': {'defense': 1.0},
     'water': {'defense': 1.0}
 }
+
+# Map generation
+map_params = {'circular_radius': 40, 'res': 8, 'octaves': 4, 'persistence': 0.5, 'num_cities': 30, 'city_spacing': 10}
+MAP_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'gwarz', 'maps')
+# Written in the background whenever a turn starts; resume with --load
+AUTOSAVE_PATH = os.path.join(os.path.expanduser('~'), '.local', 'share', 'gwarz', 'autosave.npz')
+# Every action of the last game started, for replay.py
+JOURNAL_PATH = os.path.join(os.path.expanduser('~'), '.local', 'share', 'gwarz', 'journal.jsonl')
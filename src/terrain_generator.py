@@ -1,79 +1,100 @@
 import math
-import random
 import numpy as np
+from hex_utils import HexGrid
+from settings import terrain_types
 
-def generate_perlin_noise_2d(shape, res):
+def generate_perlin_noise_2d(shape, res, rng=None):
     def f(t):
         return 6 * t**5 - 15 * t**4 + 10 * t**3
-    
+
     delta = (res[0] / shape[0], res[1] / shape[1])
     d = (shape[0] // res[0], shape[1] // res[1])
-    
-    grid = np.mgrid[0:res[0]:delta[0], 0:res[1]:delta[1]].transpose(1, 2, 0) % 1
-    
+
+    # Cell-local coordinates as a column (rows) and a row (columns); everything
+    # below broadcasts them instead of materialising a (shape, 2) grid
+    x = (np.arange(shape[0]) * delta[0] % 1)[:, None]
+    y = (np.arange(shape[1]) * delta[1] % 1)[None, :]
+
     # Gradients
-    angles = 2 * np.pi * np.random.rand(res[0] + 1, res[1] + 1)
-    gradients = np.dstack((np.cos(angles), np.sin(angles)))
-    g00 = gradients[0:-1, 0:-1].repeat(d[0], 0).repeat(d[1], 1)
-    g10 = gradients[1: , 0:-1].repeat(d[0], 0).repeat(d[1], 1)
-    g01 = gradients[0:-1, 1: ].repeat(d[0], 0).repeat(d[1], 1)
-    g11 = gradients[1: , 1: ].repeat(d[0], 0).repeat(d[1], 1)
-    
+    random = np.random.random if rng is None else rng.random
+    angles = 2 * np.pi * random((res[0] + 1, res[1] + 1))
+    gx = np.cos(angles)
+    gy = np.sin(angles)
+
+    def corner(g, i, j):
+        return g[i:i + res[0], j:j + res[1]].repeat(d[0], 0).repeat(d[1], 1)
+
     # Ramps
-    n00 = np.sum(grid * g00, 2)
-    n10 = np.sum(np.dstack((grid[:, :, 0] - 1, grid[:, :, 1])) * g10, 2)
-    n01 = np.sum(np.dstack((grid[:, :, 0], grid[:, :, 1] - 1)) * g01, 2)
-    n11 = np.sum(np.dstack((grid[:, :, 0] - 1, grid[:, :, 1] - 1)) * g11, 2)
-    
+    n00 = x * corner(gx, 0, 0) + y * corner(gy, 0, 0)
+    n10 = (x - 1) * corner(gx, 1, 0) + y * corner(gy, 1, 0)
+    n01 = x * corner(gx, 0, 1) + (y - 1) * corner(gy, 0, 1)
+    n11 = (x - 1) * corner(gx, 1, 1) + (y - 1) * corner(gy, 1, 1)
+
     # Interpolation
-    t = f(grid)
-    n0 = n00 * (1 - t[:, :, 0]) + t[:, :, 0] * n10
-    n1 = n01 * (1 - t[:, :, 0]) + t[:, :, 0] * n11
-    return np.sqrt(2) * ((1 - t[:, :, 1]) * n0 + t[:, :, 1] * n1)
+    tx = f(x)
+    ty = f(y)
+    n0 = n00 * (1 - tx) + tx * n10
+    n1 = n01 * (1 - tx) + tx * n11
+    return np.sqrt(2) * ((1 - ty) * n0 + ty * n1)
 
-def generate_fractal_noise_2d(shape, res, octaves=1, persistence=0.5):
+def generate_fractal_noise_2d(shape, res, octaves=1, persistence=0.5, rng=None):
     noise = np.zeros(shape)
     frequency = 1
     amplitude = 1
     for _ in range(octaves):
-        noise += amplitude * generate_perlin_noise_2d(shape, (frequency * res[0], frequency * res[1]))
+        noise += amplitude * generate_perlin_noise_2d(shape, (frequency * res[0], frequency * res[1]), rng)
         frequency *= 2
         amplitude *= persistence
     return noise
 
-def generate_grid_and_terrain():
-    hex_radius = 60
-    circular_radius = 40
-    grid = [(q, r) for q in range(-hex_radius, hex_radius + 1)
-            for r in range(max(-hex_radius, -q - hex_radius), min(hex_radius, -q + hex_radius) + 1)]
-    grid = [(q, r) for q, r in grid if math.sqrt((q + r/2)**2 + (r * math.sqrt(3)/2)**2) <= circular_radius]
-
-    noise_shape = (128, 128)
-    res = (8, 8)
-    octaves = 4
-    persistence = 0.5
-    noise = generate_fractal_noise_2d(noise_shape, res, octaves, persistence)
-
-    noise_offset = noise_shape[0] // 2 - hex_radius
-    noise_values = [noise[r + hex_radius + noise_offset, q + hex_radius + noise_offset] for q, r in grid]
-    noise_values.sort()
-    water_threshold = noise_values[int(0.48 * len(noise_values))]
-    mountain_threshold = noise_values[int(0.925 * len(noise_values))]
-
-    terrain = {}
-    for q, r in grid:
-        val = noise[r + hex_radius + noise_offset, q + hex_radius + noise_offset]
-        if val < water_threshold:
-            terrain[(q, r)] = 'water'
-        elif val > mountain_threshold:
-            terrain[(q, r)] = 'mountain'
-        else:
-            terrain[(q, r)] = 'land'
+def noise_shape_for(hex_radius, res, octaves):
+    """Smallest square noise field covering the map that every octave divides evenly."""
+    step = res * 2 ** (octaves - 1)
+    span = 2 * hex_radius + 1
+    side = step * math.ceil(span / step)
+    return (side, side)
 
+def generate_terrain_codes(circular_radius=40, res=8, octaves=4, persistence=0.5, water_fraction=0.48, mountain_fraction=0.925, seed=None):
+    """Generate a circular map as a HexGrid and an int8 array of terrain codes.
+
+    Hexes lie within `circular_radius` hex widths of the centre; `res` is the
+    coarsest noise resolution and `octaves` the number of fractal layers.
+    The same `seed` always yields the same map; None draws from the global
+    NumPy random state.
+    """
+    hex_radius = math.ceil(circular_radius * 2 / math.sqrt(3)) + 1
+    span = np.arange(-hex_radius, hex_radius + 1)
+    q, r = np.meshgrid(span, span, indexing='ij')
+    q = q.ravel()
+    r = r.ravel()
+    dist = np.sqrt((q + r / 2) ** 2 + (r * math.sqrt(3) / 2) ** 2)
+    inside = (np.abs(q + r) <= hex_radius) & (dist <= circular_radius)
+    q, r, dist = q[inside], r[inside], dist[inside]
+
+    noise_shape = noise_shape_for(hex_radius, res, octaves)
+    rng = None if seed is None else np.random.default_rng(seed)
+    noise = generate_fractal_noise_2d(noise_shape, (res, res), octaves, persistence, rng)
+    offset = noise_shape[0] // 2
+    values = noise[r + offset, q + offset]
+
+    water_rank = int(water_fraction * len(values))
+    mountain_rank = int(mountain_fraction * len(values))
+    ranked = np.partition(values, (water_rank, mountain_rank))
+    water_threshold = ranked[water_rank]
+    mountain_threshold = ranked[mountain_rank]
+
+    codes = np.full(len(values), terrain_types.index('land'), dtype=np.int8)
+    codes[values < water_threshold] = terrain_types.index('water')
+    codes[values > mountain_threshold] = terrain_types.index('mountain')
     # Force circular border with water
-    for q, r in grid:
-        dist = math.sqrt((q + r/2)**2 + (r * math.sqrt(3)/2)**2)
-        if dist >= circular_radius - 2:
-            terrain[(q, r)] = 'water'
+    codes[dist >= circular_radius - 2] = terrain_types.index('water')
+
+    return HexGrid.from_axial(q, r), codes
+
+def terrain_from_codes(grid, codes):
+    """Convert terrain codes to the {pos: name} dict used by the rules."""
+    return dict(zip(grid.coords, np.array(terrain_types, dtype=object)[codes].tolist()))
 
-    return grid, terrain
+def generate_grid_and_terrain(circular_radius=40, res=8, octaves=4, persistence=0.5, seed=None):
+    grid, codes = generate_terrain_codes(circular_radius, res, octaves, persistence, seed=seed)
+    return grid, terrain_from_codes(grid, codes)
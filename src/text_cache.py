@@ -0,0 +1,33 @@
+from collections import OrderedDict
+import pygame
+
+# Rendered strings kept at once. Unit digits and production markers are drawn
+# every frame and stay cached; one-off strings (turn line, info bar, odds)
+# age out least recently used first.
+TEXT_CACHE_SIZE = 512
+
+_fonts = {}
+_surfaces = OrderedDict()
+
+def get_font(name, size, bold=False):
+    """pygame.font.SysFont(name, size, bold), looked up once per arguments."""
+    key = (name, size, bold)
+    font = _fonts.get(key)
+    if font is None:
+        font = _fonts[key] = pygame.font.SysFont(name, size, bold=bold)
+    return font
+
+def render_text(font, text, color):
+    """Antialiased font.render(text, True, color), cached by (text, font, color).
+
+    The surface is shared between callers, so blit it but do not draw on it.
+    """
+    key = (text, font, color)
+    surface = _surfaces.get(key)
+    if surface is not None:
+        _surfaces.move_to_end(key)
+        return surface
+    surface = _surfaces[key] = font.render(text, True, color)
+    if len(_surfaces) > TEXT_CACHE_SIZE:
+        _surfaces.popitem(last=False)
+    return surface
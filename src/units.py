@@ -1,7 +1,163 @@
 from collections import deque
 from heapq import heappush, heappop
-from settings import movements, max_fuel, capacity, unit_stats, sea_units, max_stack
-from hex_utils import hex_distance, get_neighbors
+from settings import movements, max_fuel, capacity, unit_stats, sea_units, max_stack, city_max_hp, city_attack, city_defense, city_range
+from hex_utils import HexGrid, hex_distance, get_neighbors
+
+class Unit:
+    """A unit on the map or carried by a transport, identified by a stable ID."""
+
+    __slots__ = ('id', 'type', 'owner', 'pos', 'movement_left', 'fuel', 'hp', 'max_hp',
+                 'attack', 'defense', 'range', 'did_move', 'sentry', 'path')
+
+    def __init__(self, uid: int, utype: str, owner: str, pos: tuple, movement_left: int = 0, fuel: int = None):
+        stats = unit_stats[utype]
+        self.id = uid
+        self.type = utype
+        self.owner = owner
+        self.pos = pos
+        self.movement_left = movement_left
+        self.fuel = fuel
+        self.hp = stats['max_hp']
+        self.max_hp = stats['max_hp']
+        self.attack = stats['attack']
+        self.defense = stats['defense']
+        self.range = stats['range']
+        self.did_move = False
+        self.sentry = False
+        self.path = None
+
+    def __repr__(self):
+        return f"Unit({self.id}, {self.type!r}, {self.owner!r}, {self.pos})"
+
+class CityDefender:
+    """Stand-in for a city when it is attacked, carrying the city's combat stats."""
+
+    __slots__ = ('pos', 'owner', 'hp', 'max_hp', 'attack', 'defense', 'range', 'type')
+
+    def __init__(self, pos: tuple, owner: str, hp: int):
+        self.pos = pos
+        self.owner = owner
+        self.hp = hp
+        self.max_hp = city_max_hp
+        self.attack = city_attack
+        self.defense = city_defense
+        self.range = city_range
+        self.type = 'City'
+
+class UnitRegistry:
+    """On-map units in registration order, indexed by position and by owner.
+
+    Units are keyed by their stable ID, so membership and removal are O(1).
+    Positions of registered units must be changed through `move` so the index
+    stays in sync. Units carried by a transport are not registered.
+
+    `version` increases on every change to the board that affects movement
+    (registration, moves, and anything reported through `mark_changed`), so
+    caches can key on it. When `zone` is set (a board.ZoneOfControl) it is
+    told about every registration, move and removal.
+    """
+
+    def __init__(self, units=(), next_id: int = 1):
+        self.version = 0
+        self._units = {}
+        self._order = {}
+        self._by_pos = {}
+        self._by_owner = {}
+        self.zone = None
+        self._next_order = 0
+        self._next_id = next_id
+        # Same as appending each unit, in one pass without the per-call overhead
+        by_pos, by_owner = self._by_pos, self._by_owner
+        for order, unit in enumerate(units):
+            self._units[unit.id] = unit
+            self._order[unit.id] = order
+            by_pos.setdefault(unit.pos, []).append(unit)
+            by_owner.setdefault(unit.owner, {})[unit.id] = unit
+        if self._units:
+            self._next_order = len(self._units)
+            self._next_id = max(next_id, max(self._units) + 1)
+            self.version = 1
+
+    def __len__(self):
+        return len(self._units)
+
+    def __iter__(self):
+        return iter(self._units.values())
+
+    def __contains__(self, unit):
+        return unit is not None and unit.id in self._units
+
+    def create(self, utype: str, owner: str, pos: tuple, movement_left: int = 0, fuel: int = None) -> Unit:
+        """Build a unit with a fresh ID and register it at pos."""
+        unit = Unit(self._next_id, utype, owner, pos, movement_left, fuel)
+        self.append(unit)
+        return unit
+
+    @property
+    def next_id(self) -> int:
+        """ID the next created unit will get; above every ID handed out so far."""
+        return self._next_id
+
+    def get(self, uid: int) -> Unit:
+        """Return the registered unit with this ID, or None."""
+        return self._units.get(uid)
+
+    def append(self, unit: Unit):
+        """Register a unit at its current position."""
+        self._units[unit.id] = unit
+        self._next_id = max(self._next_id, unit.id + 1)
+        self._order[unit.id] = self._next_order
+        self._next_order += 1
+        self._by_pos.setdefault(unit.pos, []).append(unit)
+        self._by_owner.setdefault(unit.owner, {})[unit.id] = unit
+        if self.zone:
+            self.zone.add_unit(unit)
+        self.version += 1
+
+    def remove(self, unit: Unit):
+        """Unregister a unit; raises ValueError if it is not on the map."""
+        if unit.id not in self._units:
+            raise ValueError("unit is not registered")
+        del self._units[unit.id]
+        del self._order[unit.id]
+        del self._by_owner[unit.owner][unit.id]
+        self._unindex(unit)
+        if self.zone:
+            self.zone.remove_unit(unit)
+        self.version += 1
+
+    def move(self, unit: Unit, pos: tuple):
+        """Move a registered unit to pos, keeping each stack in registration order."""
+        self._unindex(unit)
+        src = unit.pos
+        unit.pos = pos
+        stack = self._by_pos.setdefault(pos, [])
+        order = self._order[unit.id]
+        i = len(stack)
+        while i > 0 and self._order[stack[i - 1].id] > order:
+            i -= 1
+        stack.insert(i, unit)
+        if self.zone:
+            self.zone.move_unit(unit, src)
+        self.version += 1
+
+    def mark_changed(self):
+        """Record a board change made outside the registry, such as a city changing hands."""
+        self.version += 1
+
+    def at(self, pos: tuple) -> list:
+        """Return the units at pos in registration order (do not mutate)."""
+        return self._by_pos.get(pos, [])
+
+    def owned_by(self, owner: str) -> list:
+        """Return a snapshot of owner's units in registration order."""
+        return list(self._by_owner.get(owner, {}).values())
+
+    def _unindex(self, unit):
+        stack = self._by_pos[unit.pos]
+        stack.remove(unit)
+        if not stack:
+            del self._by_pos[unit.pos]
 
 def get_allowed(utype: str) -> set:
     """Return allowed terrain types for a unit type."""
@@ -13,74 +169,83 @@ def get_allowed(utype: str) -> set:
         return {'water', 'land', 'mountain'}
     return set()
 
-def is_loadable_transport_hex(key: tuple, unit: dict, units: list, transport_loads: dict, terrain: dict, cities: list, city_owners: dict, grid: list) -> bool:
+def is_loadable_transport_hex(key: tuple, unit: Unit, units: UnitRegistry, transport_loads: dict, terrain: dict, cities: list, city_owners: dict, grid: HexGrid) -> bool:
     """Check if a hex contains a loadable transport for the unit."""
-    utype = unit['type']
-    owner = unit['owner']
+    utype = unit.type
+    owner = unit.owner
     # Allow loading onto TransportShip if adjacent to land or owned city
     if utype in ['Infantry', 'Tank']:
         for n in get_neighbors(*key, grid):
             if terrain.get(n) == 'land' or (n in cities and city_owners.get(n) == owner):
-                transport = any(u['pos'] == key and u['type'] == 'TransportShip' and utype in capacity[u['type']]['allowed'] and u['owner'] == owner and len(transport_loads.get(id(u), [])) < capacity[u['type']]['max'] for u in units)
+                transport = any(u.type == 'TransportShip' and utype in capacity[u.type]['allowed'] and u.owner == owner and len(transport_loads.get(u.id, [])) < capacity[u.type]['max'] for u in units.at(key))
                 # print(f"Checking loadable hex {key} for {utype}: transport={transport}, adjacent_land={any(terrain.get(n) == 'land' for n in get_neighbors(*key, grid))}, adjacent_owned_city={any(n in cities and city_owners.get(n) == owner for n in get_neighbors(*key, grid))}")
                 return transport
-    return any(u['pos'] == key and u['type'] in capacity and utype in capacity[u['type']]['allowed'] and u['owner'] == owner and len(transport_loads.get(id(u), [])) < capacity[u['type']]['max'] for u in units)
+    return any(u.type in capacity and utype in capacity[u.type]['allowed'] and u.owner == owner and len(transport_loads.get(u.id, [])) < capacity[u.type]['max'] for u in units.at(key))
 
-def get_unit_count_at(pos: tuple, units: list) -> int:
+def get_unit_count_at(pos: tuple, units: UnitRegistry) -> int:
     """Count units at a given position."""
-    return sum(1 for u in units if u['pos'] == pos)
+    return len(units.at(pos))
 
-def is_hex_occupied(pos: tuple, owner: str, units: list, cities: list, city_owners: dict, max_stack: int) -> bool:
+def is_hex_occupied(pos: tuple, owner: str, units: UnitRegistry, cities: list, city_owners: dict, max_stack: int) -> bool:
     """Check if a hex is occupied, respecting stacking limits for owned cities."""
     if pos in cities and city_owners[pos] == owner:
         return get_unit_count_at(pos, units) >= max_stack
     return get_unit_count_at(pos, units) > 0
 
-def get_reachable(unit: dict, grid: list, terrain: dict, cities: list, city_owners: dict, units: list, coastal_cities: set, transport_loads: dict) -> set:
-    """Calculate reachable hexes for a unit within movement range."""
-    pos = unit['pos']
-    mov = unit['movement_left']
-    utype = unit['type']
-    fuel = unit['fuel'] if 'fuel' in unit else None
+def get_reachable_distances(unit: Unit, grid: HexGrid, terrain: dict, cities: list, city_owners: dict, units: UnitRegistry, coastal_cities: set, transport_loads: dict) -> dict:
+    """Map each hex the unit can reach this turn to its movement cost.
+
+    Breadth-first search bounded by the unit's movement (and fuel); hexes are
+    marked when queued, so each one is evaluated exactly once.
+    """
+    pos = unit.pos
+    mov = unit.movement_left
+    utype = unit.type
+    owner = unit.owner
+    fuel = unit.fuel
     if utype in ['Fighter', 'TransportPlane'] and fuel is not None:
         mov = min(mov, fuel)
     allowed = get_allowed(utype)
-    visited = set()
-    queue = deque([(pos[0], pos[1], 0)])
-    reach = set()
+    is_sea_unit = utype in sea_units
+    city_set = set(cities)
+    distances = {}
+    if mov < 0:
+        return distances
+    visited = {pos}
+    queue = deque([(pos, 0)])
     while queue:
-        cq, cr, dist = queue.popleft()
-        key = (cq, cr)
-        if key in visited or dist > mov:
-            continue
-        visited.add(key)
-        if key in cities and city_owners[key] is None or (key not in cities and any(u['pos'] == key and u['type'] == 'AirCarrier' and u['owner'] != unit['owner'] for u in units)):
+        key, dist = queue.popleft()
+        if key in city_set and city_owners[key] is None or (key not in city_set and any(u.type == 'AirCarrier' and u.owner != owner for u in units.at(key))):
             continue
-        is_sea_unit = utype in sea_units
-        allow_city = is_sea_unit and key in coastal_cities and city_owners.get(key) == unit['owner']
-        loadable = is_loadable_transport_hex(key, unit, units, transport_loads, terrain, cities, city_owners, grid)
-        occupied = is_hex_occupied(key, unit['owner'], units, cities, city_owners, max_stack)
-        if dist == 0 or (terrain[key] in allowed or loadable or allow_city) and (not occupied or loadable):
-            if utype == 'Fighter' and any(u['pos'] == key and u['type'] == 'AirCarrier' and u['owner'] == unit['owner'] and len(transport_loads.get(id(u), [])) < capacity['AirCarrier']['max'] for u in units):
-                if dist > 0:
-                    reach.add(key)
-            if dist > 0:
-                reach.add(key)
-            for nq, nr in get_neighbors(cq, cr, grid):
-                n_key = (nq, nr)
-                if n_key in cities and city_owners[n_key] != unit['owner'] and utype != 'Infantry':
+        if dist > 0:
+            allow_city = is_sea_unit and key in coastal_cities and city_owners.get(key) == owner
+            occupied = is_hex_occupied(key, owner, units, cities, city_owners, max_stack)
+            if terrain[key] not in allowed and not allow_city or occupied:
+                if not is_loadable_transport_hex(key, unit, units, transport_loads, terrain, cities, city_owners, grid):
                     continue
-                queue.append((nq, nr, dist + 1))
-    # print(f"Reachable hexes for {utype} at {pos}: {reach}")
-    return reach
+            distances[key] = dist
+        if dist == mov:
+            continue
+        for n_key in grid.neighbors(*key):
+            if n_key in visited:
+                continue
+            if n_key in city_set and city_owners[n_key] != owner and utype != 'Infantry':
+                continue
+            visited.add(n_key)
+            queue.append((n_key, dist + 1))
+    return distances
+
+def get_reachable(unit: Unit, grid: HexGrid, terrain: dict, cities: list, city_owners: dict, units: UnitRegistry, coastal_cities: set, transport_loads: dict) -> set:
+    """Calculate reachable hexes for a unit within movement range."""
+    return set(get_reachable_distances(unit, grid, terrain, cities, city_owners, units, coastal_cities, transport_loads))
 
-def get_fuel_range(unit: dict, grid: list, terrain: dict) -> set:
+def get_fuel_range(unit: Unit, grid: HexGrid, terrain: dict) -> set:
     """Calculate fuel range border for Fighter and TransportPlane."""
-    if unit['type'] not in ['Fighter', 'TransportPlane'] or unit['fuel'] is None:
+    if unit.type not in ['Fighter', 'TransportPlane'] or unit.fuel is None:
         return set()
-    pos = unit['pos']
-    fuel = unit['fuel']
-    allowed = get_allowed(unit['type'])
+    pos = unit.pos
+    fuel = unit.fuel
+    allowed = get_allowed(unit.type)
     visited = set()
     queue = deque([(pos[0], pos[1], 0)])
     range_border = set()
@@ -98,28 +263,67 @@ def get_fuel_range(unit: dict, grid: list, terrain: dict) -> set:
                 queue.append((nq, nr, dist + 1))
     return range_border
 
-def find_path(start: tuple, goal: tuple, unit: dict, grid: list, terrain: dict, cities: list, city_owners: dict, units: list, transport_loads: dict, capacity: dict, coastal_cities: set) -> list:
-    """Find a path from start to goal for the unit using A*."""
-    if start == goal:
-        return []
-    utype = unit['type']
+def _path_passability(unit: Unit, grid: HexGrid, terrain: dict, cities: list, city_owners: dict, units: UnitRegistry, transport_loads: dict, capacity: dict, coastal_cities: set):
+    """Return a memoized predicate telling whether the unit may path through a hex.
+
+    The rule depends only on the hex (not on where the unit comes from), so each
+    hex is evaluated at most once per query.
+    """
+    utype = unit.type
+    owner = unit.owner
     allowed = get_allowed(utype)
     is_sea_unit = utype in sea_units
-    allow_city = is_sea_unit and goal in coastal_cities and city_owners.get(goal) == unit['owner']
+    carrier_max = capacity['AirCarrier']['max']
+    memo = {}
+
+    def passable(pos):
+        result = memo.get(pos)
+        if result is not None:
+            return result
+        result = True
+        if pos in cities and (city_owners[pos] is None or city_owners[pos] != owner and utype != 'Infantry'):
+            result = False
+        else:
+            for u in units.at(pos):
+                if u.type == 'AirCarrier' and (u.owner != owner or len(transport_loads.get(u.id, [])) >= carrier_max):
+                    result = False
+                    break
+        if result:
+            allow_city = is_sea_unit and pos in coastal_cities and city_owners.get(pos) == owner
+            if terrain[pos] not in allowed and not allow_city or is_hex_occupied(pos, owner, units, cities, city_owners, max_stack):
+                result = is_loadable_transport_hex(pos, unit, units, transport_loads, terrain, cities, city_owners, grid)
+        memo[pos] = result
+        return result
+
+    return passable
+
+def _goal_blocked(goal: tuple, unit: Unit, grid: HexGrid, terrain: dict, cities: list, city_owners: dict, units: UnitRegistry, transport_loads: dict, coastal_cities: set) -> bool:
+    """Check whether the unit may not end a path on goal."""
+    allowed = get_allowed(unit.type)
+    allow_city = unit.type in sea_units and goal in coastal_cities and city_owners.get(goal) == unit.owner
     loadable = is_loadable_transport_hex(goal, unit, units, transport_loads, terrain, cities, city_owners, grid)
-    occupied = is_hex_occupied(goal, unit['owner'], units, cities, city_owners, max_stack)
+    occupied = is_hex_occupied(goal, unit.owner, units, cities, city_owners, max_stack)
     if terrain[goal] not in allowed and not loadable and not allow_city or (occupied and not loadable):
-        # print(f"Path to {goal} blocked: terrain={terrain.get(goal)}, loadable={loadable}, allow_city={allow_city}, occupied={occupied}")
-        return None
-    if goal in cities and city_owners[goal] is None:
+        return True
+    return goal in cities and city_owners[goal] is None
+
+def find_path(start: tuple, goal: tuple, unit: Unit, grid: HexGrid, terrain: dict, cities: list, city_owners: dict, units: UnitRegistry, transport_loads: dict, capacity: dict, coastal_cities: set) -> list:
+    """Find a path from start to goal for the unit using A*."""
+    if start == goal:
+        return []
+    if _goal_blocked(goal, unit, grid, terrain, cities, city_owners, units, transport_loads, coastal_cities):
         return None
+    passable = _path_passability(unit, grid, terrain, cities, city_owners, units, transport_loads, capacity, coastal_cities)
     came_from = {}
     g_score = {start: 0}
-    f_score = {start: hex_distance(start, goal)}
-    open_set = []
-    heappush(open_set, (f_score[start], start))
-    while open_set:
-        _, current = heappop(open_set)
+    # Each hex sits in the heap at most once, keyed by the f-score it was first
+    # queued with; improving its g-score later re-parents it without re-queuing.
+    # This ordering decides ties between equal-length routes, so keep it stable.
+    open_heap = [(hex_distance(start, goal), start)]
+    in_open = {start}
+    while open_heap:
+        _, current = heappop(open_heap)
+        in_open.discard(current)
         if current == goal:
             path = []
             while current in came_from:
@@ -127,22 +331,66 @@ def find_path(start: tuple, goal: tuple, unit: dict, grid: list, terrain: dict,
                 current = came_from[current]
             path.reverse()
             return path
-        for neighbor in get_neighbors(*current, grid):
-            allow_neighbor_city = is_sea_unit and neighbor in coastal_cities and city_owners.get(neighbor) == unit['owner']
-            n_loadable = is_loadable_transport_hex(neighbor, unit, units, transport_loads, terrain, cities, city_owners, grid)
-            n_occupied = is_hex_occupied(neighbor, unit['owner'], units, cities, city_owners, max_stack)
-            if (terrain[neighbor] not in allowed and not n_loadable and not allow_neighbor_city) or (n_occupied and not n_loadable) or \
-               (neighbor in cities and city_owners[neighbor] is None) or \
-               (neighbor in cities and city_owners[neighbor] != unit['owner'] and utype != 'Infantry') or \
-               (any(u['pos'] == neighbor and u['type'] == 'AirCarrier' and u['owner'] != unit['owner'] for u in units)) or \
-               (any(u['pos'] == neighbor and u['type'] == 'AirCarrier' and u['owner'] == unit['owner'] and len(transport_loads.get(id(u), [])) >= capacity['AirCarrier']['max'] for u in units)):
+        tentative_g = g_score[current] + 1
+        for neighbor in grid.neighbors(*current):
+            if tentative_g >= g_score.get(neighbor, float('inf')) or not passable(neighbor):
                 continue
-            tentative_g = g_score[current] + 1
-            if tentative_g < g_score.get(neighbor, float('inf')):
-                came_from[neighbor] = current
-                g_score[neighbor] = tentative_g
-                f_score[neighbor] = tentative_g + hex_distance(neighbor, goal)
-                if neighbor not in [i[1] for i in open_set]:
-                    heappush(open_set, (f_score[neighbor], neighbor))
-    # print(f"No path found from {start} to {goal} for {utype}")
+            came_from[neighbor] = current
+            g_score[neighbor] = tentative_g
+            if neighbor not in in_open:
+                in_open.add(neighbor)
+                heappush(open_heap, (tentative_g + hex_distance(neighbor, goal), neighbor))
     return None
+
+class PathCache:
+    """Shortest-path predecessor fields shared by repeated path queries.
+
+    A field maps hexes reachable from a source hex, by a unit type and owner,
+    to the hex they are entered from. It is grown by breadth-first search only
+    until the requested target is reached, and keeps its frontier so a later
+    target from the same source resumes the search instead of restarting it.
+    Fields are dropped when the registry's board version changes, so dragging
+    a preview across the map costs at most one search in total, and a nearby
+    target costs no more than its neighbourhood. Paths are shortest paths;
+    ties may break differently than in find_path.
+    """
+
+    def __init__(self):
+        self._version = None
+        self._searches = {}
+
+    def _search(self, start: tuple, unit: Unit, grid: HexGrid, terrain: dict, cities: list, city_owners: dict, units: UnitRegistry, transport_loads: dict, capacity: dict, coastal_cities: set) -> tuple:
+        """Return the (predecessor field, frontier, passability) search from start for the unit's type and owner."""
+        if units.version != self._version:
+            self._searches.clear()
+            self._version = units.version
+        key = (start, unit.type, unit.owner)
+        search = self._searches.get(key)
+        if search is None:
+            passable = _path_passability(unit, grid, terrain, cities, city_owners, units, transport_loads, capacity, coastal_cities)
+            search = self._searches[key] = ({start: None}, deque([start]), passable)
+        return search
+
+    def find_path(self, start: tuple, goal: tuple, unit: Unit, grid: HexGrid, terrain: dict, cities: list, city_owners: dict, units: UnitRegistry, transport_loads: dict, capacity: dict, coastal_cities: set) -> list:
+        """Drop-in replacement for find_path that reads the path from a cached field."""
+        if start == goal:
+            return []
+        if _goal_blocked(goal, unit, grid, terrain, cities, city_owners, units, transport_loads, coastal_cities):
+            return None
+        came_from, queue, passable = self._search(start, unit, grid, terrain, cities, city_owners, units, transport_loads, capacity, coastal_cities)
+        # A hex's predecessor is final once it is discovered, so stop there
+        while goal not in came_from and queue:
+            current = queue.popleft()
+            for neighbor in grid.neighbors(*current):
+                if neighbor not in came_from and passable(neighbor):
+                    came_from[neighbor] = current
+                    queue.append(neighbor)
+        if goal not in came_from:
+            return None
+        path = []
+        current = goal
+        while current != start:
+            path.append(current)
+            current = came_from[current]
+        path.reverse()
+        return path